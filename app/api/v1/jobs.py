@@ -0,0 +1,49 @@
+import base64
+from celery.result import AsyncResult
+from fastapi import APIRouter, HTTPException, File, UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.api.v1.schemas import TextModerationRequest
+from app.workers.celery_app import celery_app
+from app.workers.tasks import moderate_text_task, moderate_image_task
+
+router = APIRouter(prefix="/jobs")
+
+async def _enqueue(task, *args):
+    """Publish a task without blocking the event loop on the broker round-trip."""
+    try:
+        result = await run_in_threadpool(task.apply_async, args=args, retry=False)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {str(e)}")
+    return {"job_id": result.id, "status": result.state}
+
+@router.post("/moderate/text", status_code=202)
+async def create_text_job(request: TextModerationRequest):
+    """Queue a text for moderation by the Celery workers and return its job id."""
+    if not request.text:
+        raise HTTPException(status_code=400, detail="No text provided")
+    return await _enqueue(moderate_text_task, request.text)
+
+@router.post("/moderate/image", status_code=202)
+async def create_image_job(file: UploadFile = File(...)):
+    """Queue an image for moderation by the Celery workers and return its job id."""
+    if file.content_type not in ["image/jpeg", "image/png", "image/jpg"]:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use JPEG or PNG.")
+    image_bytes = await file.read()
+    return await _enqueue(moderate_image_task, file.filename, base64.b64encode(image_bytes).decode("utf-8"))
+
+def _job_status(job_id: str) -> dict:
+    result = AsyncResult(job_id, app=celery_app)
+    status = {"job_id": job_id, "status": result.state}
+    if result.successful():
+        status["result"] = result.result
+    elif result.failed():
+        status["error"] = str(result.result)
+    return status
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Return the state of a moderation job, with its result once it has finished."""
+    try:
+        return await run_in_threadpool(_job_status, job_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Job backend unavailable: {str(e)}")
@@ -1,35 +1,76 @@
-import os
-import json
-import io
-import requests
-from PIL import Image
-from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Request, Response
-from sqlalchemy.orm import Session
+from PIL import UnidentifiedImageError
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query, Request, Response
+from sqlalchemy import text as sql_text
+from sqlalchemy.ext.asyncio import AsyncSession
 from celery.result import AsyncResult
-from app.core.database import SessionLocal, get_db
-from app.api.v1.schemas import TextModerationRequest, TextModerationResponse
-from app.models.moderation import ModerationResult
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.api.v1.schemas import TextModerationRequest, TextModerationResponse, BatchTextModerationRequest, ResultLookupRequest
 from app.core.cache import get_redis
-# from app.workers.tasks import test_celery
-import base64
-from fastapi.responses import PlainTextResponse
-from prometheus_client import Counter
+from app.core.config import (
+    GOOGLE_MODERATION_API_KEY,
+    STATS_MAX_BUCKETS,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    EXPORT_FETCH_SIZE,
+    INGEST_BATCH_SIZE,
+    INGEST_CONCURRENCY,
+    INGEST_MAX_LINE_BYTES,
+)
+from app.services.moderation import (
+    UpstreamError,
+    get_cached_text_result,
+    match_known_text,
+    moderate_text,
+    moderate_texts,
+    moderate_image,
+    text_router,
+)
+from app.services.image_preprocess import preprocess_image
+from app.services.stats import read_stats
+from app.services.rollups import parse_window, read_window_stats
+from app.services.results_query import build_filters, decode_cursor, search_results
+from app.services.export import encode_export, fetch_batches
+from app.services.ingest import IngestError, ingest_lines, iter_lines
+from app.services.result_records import lookup_results
+from app.workers.celery_app import celery_app
+from app.workers.tasks import test_celery
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-REQUEST_COUNT = Counter('request_count', 'Total request count', ['method', 'endpoint', 'http_status'])
-REQUEST_LATENCY = Counter('request_latency', 'Total time taken for request', ['method', 'endpoint', 'http_status'])
-
-load_dotenv()
-
-GOOGLE_MODERATION_API_KEY = os.getenv("GOOGLE_MODERATION_API_KEY")
-if not GOOGLE_MODERATION_API_KEY:
+# Text moderation without Perspective runs fully offline; otherwise the Google key is required
+if not GOOGLE_MODERATION_API_KEY and "perspective" in text_router.provider_names:
     raise ValueError("Google Moderation API key is missing. Set GOOGLE_MODERATION_API_KEY in .env file.")
 
-PERSPECTIVE_API_URL = "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze"
-GOOGLE_VISION_API_URL = "https://vision.googleapis.com/v1/images:annotate"
-
 router = APIRouter()
 
+Likelihood = Literal["UNKNOWN", "VERY_UNLIKELY", "UNLIKELY", "POSSIBLE", "LIKELY", "VERY_LIKELY"]
+
+def moderation_filters(
+    flagged: Optional[bool] = None,
+    content_type: Optional[Literal["text", "image"]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_toxicity: Optional[float] = Query(None, ge=0, le=1, description="toxicity_score greater than this (text results)"),
+    max_toxicity: Optional[float] = Query(None, ge=0, le=1, description="toxicity_score at most this (text results)"),
+    adult: Optional[Likelihood] = None,
+    violence: Optional[Likelihood] = None,
+    racy: Optional[Likelihood] = None,
+    medical: Optional[Likelihood] = None,
+    spoof: Optional[Likelihood] = None,
+) -> list:
+    """Shared query filters for listing stored moderation results."""
+    return build_filters(
+        flagged=flagged,
+        content_type=content_type,
+        created_after=created_after,
+        created_before=created_before,
+        min_toxicity=min_toxicity,
+        max_toxicity=max_toxicity,
+        safesearch={"adult": adult, "violence": violence, "racy": racy, "medical": medical, "spoof": spoof},
+    )
+
 @router.get("/")
 async def root():
     return {"message": "Welcome to ModeraAI - go to /start to check system status"}
@@ -40,13 +81,8 @@ async def start_system():
 
     # Check database
     try:
-        db = SessionLocal()
-        from sqlalchemy.sql import text
-        if db.execute(text("SELECT 1")): # Simple query to check DB connection
-            db_status = f"DB Status Check - Postgres is Up and Running"
-        else:
-            db_status = f"DB Status Check - Postgres Server is not Running: {str(e)}"  
-        db.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(sql_text("SELECT 1"))  # Simple query to check DB connection
         db_status = "DB Status Check - Postgres is Up and Running"
     except Exception as e:
         db_status = f"DB Status Check - Postgres Server is not Running: {str(e)}"
@@ -60,199 +96,182 @@ async def start_system():
         redis_status = f"Redis Status Check - Redis Server is not Running: {str(e)}"
 
     # Check Celery
-    # try:
-    #     task = test_celery.delay()
-    #     result = AsyncResult(task.id)
-    #     celery_status = result.state  # Expected to be 'PENDING'
-    #     if celery_status != 'PENDING':
-    #         celery_status = "Celery Status Check - Celery is Up and Running"
-    #     else:
-    #         celery_status = "Celery Status Check - Celery Task is Pending"
-    # except Exception as e:
-    #     celery_status = f"Celery Status Check - Celery Server is not Running: {str(e)}"
+    try:
+        task = await run_in_threadpool(test_celery.apply_async, retry=False)
+        result = AsyncResult(task.id, app=celery_app)
+        celery_status = await run_in_threadpool(lambda: result.state)
+        if celery_status != 'PENDING':
+            celery_status = "Celery Status Check - Celery is Up and Running"
+        else:
+            celery_status = "Celery Status Check - Celery Task is Pending"
+    except Exception as e:
+        celery_status = f"Celery Status Check - Celery Server is not Running: {str(e)}"
 
     return {
         "database": db_status,
         "redis": redis_status,
-        # "celery": celery_status,
+        "celery": celery_status,
         "message": "System is up and running - all services are operational"
     }
     
 @router.post("/moderate/text")
-async def moderate_text_endpoint(request: TextModerationRequest, db: Session = Depends(get_db)):
-    """Endpoint for text moderation using Google Perspective API."""
-    REQUEST_COUNT.labels("POST", "/api/v1/moderate/text", 200).inc()
-    REQUEST_LATENCY.labels("POST", "/api/v1/moderate/text", 200).inc()
+async def moderate_text_endpoint(request: TextModerationRequest):
+    """Endpoint for text moderation using Google Perspective API or the local engine."""
     text = request.text
     if not text:
         raise HTTPException(status_code=400, detail="No text provided")
 
-    redis_client = await get_redis()
-    cache_key = f"moderation:text:{text}"
-    cached_result = await redis_client.get(cache_key)
+    # Known content is answered from memory, before Redis or any provider
+    known_result = match_known_text(text)
+    if known_result:
+        return known_result
+
+    cached_result = await get_cached_text_result(text)
     if cached_result:
-        return json.loads(cached_result)
+        return cached_result
 
-    request_data = {
-        "comment": {"text": text},
-        "languages": ["en"],
-        "requestedAttributes": {"TOXICITY": {}}
-    }
     try:
-        response = requests.post(
-            f"{PERSPECTIVE_API_URL}?key={GOOGLE_MODERATION_API_KEY}",
-            json=request_data,
-            timeout=5  # Add timeout to prevent hanging
-        )
-        response.raise_for_status()  # Raises error for non-200 responses
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=502, detail=f"External API error: {str(e)}")
-    
-    # print(response.json())
-    result = response.json()
-    toxicity_score = result["attributeScores"]["TOXICITY"]["summaryScore"]["value"]
-    flagged = toxicity_score > 0.5
-    
-    moderation_result = {
-        "text": text,
-        "flagged": flagged,
-        "categories": {"toxicity_score": toxicity_score}
-    }
-    
-    db_entry = ModerationResult(
-        text=text, 
-        flagged=flagged, 
-        categories={"toxicity_score": toxicity_score}
-    )
-    db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
-    
-    await redis_client.setex(cache_key, 3600, json.dumps(moderation_result))
-    return moderation_result
+        return await moderate_text(text)
+    except UpstreamError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.post("/moderate/text/batch")
+async def moderate_text_batch_endpoint(request: BatchTextModerationRequest):
+    """
+    Endpoint for moderating many texts in one call.
+    Identical texts are moderated once, cache hits are resolved with a single MGET
+    and the remaining texts are sent to Perspective concurrently.
+    """
+    texts = [item.text for item in request.items]
+    if not all(texts):
+        raise HTTPException(status_code=400, detail="No text provided")
+
+    try:
+        return {"results": await moderate_texts(texts)}
+    except UpstreamError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.post("/moderate/text/ingest")
+async def ingest_text_endpoint(
+    request: Request,
+    field: str = Query("text", description="JSON key holding the text on each line"),
+    skip_lines: int = Query(0, ge=0, description="checkpoint from an earlier, interrupted ingest"),
+):
+    """
+    Moderate an NDJSON upload line by line. The body is read as a stream and
+    moderated in batches, so uploads of any size use bounded memory.
+    """
+    lines = iter_lines(request.stream(), INGEST_MAX_LINE_BYTES)
+    try:
+        return await ingest_lines(lines, field, INGEST_BATCH_SIZE, INGEST_CONCURRENCY, skip_lines)
+    except IngestError as e:
+        # The checkpoint lets the client resume with ?skip_lines=<checkpoint>
+        status_code = getattr(e.__cause__, "status_code", 500)
+        raise HTTPException(status_code=status_code, detail={"error": str(e), **e.progress})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/moderate/image")
-async def moderate_image_endpoint(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def moderate_image_endpoint(file: UploadFile = File(...)):
     """
     Endpoint for image moderation using Google Vision API's SafeSearch Detection.
     Supports JPG, JPEG and PNG formats.
     """
-    REQUEST_COUNT.labels("POST", "/api/v1/moderate/image", 200).inc()
-    REQUEST_LATENCY.labels("POST", "/api/v1/moderate/image", 200).inc()
     if file.content_type not in ["image/jpeg", "image/png", "image/jpg"]:
         raise HTTPException(status_code=400, detail="Unsupported file format. Use JPEG or PNG.")
 
     try:
-        # Read image bytes and validate the image
+        # Read image bytes, then validate, fingerprint and downscale off the event loop
         image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-        image.verify()
+        prepared = await preprocess_image(image_bytes)
     except UnidentifiedImageError as e:
         raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading image: {str(e)}")
 
-    # Convert image to Base64
-    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-
-    # Construct API request payload
-    vision_request = {
-        "requests": [{
-            "image": {"content": image_base64},
-            "features": [{"type": "SAFE_SEARCH_DETECTION"}]
-        }]
-    }
-
-    redis_client = await get_redis()
-    cache_key = f"moderation:image:{file.filename}"
-    cached_result = await redis_client.get(cache_key)
-    if cached_result:
-        return json.loads(cached_result)
-
-    # Call Google Vision API
-    response = requests.post(
-        f"{GOOGLE_VISION_API_URL}?key={GOOGLE_MODERATION_API_KEY}",
-        json=vision_request
-    )
-    response_data = response.json()
-
     try:
-        response_data = response.json()
-        safe_search = response_data["responses"][0].get("safeSearchAnnotation", {})
-    except (KeyError, IndexError) as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected response: {str(e)}")
+        return await moderate_image(file.filename, prepared)
+    except UpstreamError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
-    annotations = response_data["responses"][0]["safeSearchAnnotation"]
-    flagged = annotations["adult"] in ["LIKELY", "VERY_LIKELY"] or annotations["violence"] in ["LIKELY", "VERY_LIKELY"]
-
-    # Prepare moderation result
-    moderation_result = {
-        "filename": file.filename,
-        "flagged": flagged,
-        "categories": annotations
-    }
+@router.get("/moderation")
+async def search_moderation_results(
+    filters: list = Depends(moderation_filters),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stored results, newest first, with keyset pagination."""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await search_results(db, filters, limit, cursor)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-    # Store result in database
-    db_entry = ModerationResult(
-        text=file.filename, flagged=flagged, categories=annotations
-    )
-    db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
+@router.get("/moderation/export")
+async def export_moderation_results(
+    filters: list = Depends(moderation_filters),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    compress: bool = Query(False, alias="gzip"),
+    after_id: Optional[int] = Query(None, description="Resume after the last id already received"),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """Stream every matching result in id order; memory use does not grow with the export size."""
+    filename = f"moderation_results.{export_format}" + (".gz" if compress else "")
+    if compress:
+        media_type = "application/gzip"
+    else:
+        media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    # The generator opens its own session: it outlives the request's dependencies
+    body = encode_export(fetch_batches(filters, after_id, limit, EXPORT_FETCH_SIZE), export_format, compress)
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
-    # Cache the result for future requests
-    await redis_client.setex(cache_key, 3600, json.dumps(moderation_result))
-    return moderation_result
+@router.post("/moderation/lookup")
+async def lookup_moderation_results(request: ResultLookupRequest, db: AsyncSession = Depends(get_async_db)):
+    """Fetch many stored results at once; `results` follows the order of `ids`, with null for unknown ids."""
+    try:
+        return {"results": await lookup_results(db, request.ids)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/moderation/{id}")
-async def get_moderation_result(id: int, db: Session = Depends(get_db)):
-    REQUEST_COUNT.labels("GET", "/api/v1/moderation/{id}", 200).inc()
-    REQUEST_LATENCY.labels("GET", "/api/v1/moderation/{id}", 200).inc()
+async def get_moderation_result(id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        redis_client = await get_redis()
-        cache_key = f"moderation:{id}"
-        cached_result = await redis_client.get(cache_key)
-        if cached_result:
-            return json.loads(cached_result)
-        
-        result = db.query(ModerationResult).filter(ModerationResult.id == id).first()
-        if not result:
-            raise HTTPException(status_code=404, detail="Moderation result not found")
-        
-        response = {
-            "id": result.id,
-            "text": result.text,
-            "flagged": result.flagged,
-            "categories": result.categories,
-        }
-        
-        await redis_client.set(cache_key, json.dumps(response), ex=3600)
-        return response
+        (result,) = await lookup_results(db, [id])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-        
+    if result is None:
+        raise HTTPException(status_code=404, detail="Moderation result not found")
+    return result
+
 @router.get("/stats")
-async def get_moderation_stats(db: Session = Depends(get_db)):
-    REQUEST_COUNT.labels("GET", "/api/v1/stats", 200).inc
-    REQUEST_LATENCY.labels("GET", "/api/v1/stats", 200).inc()
+async def get_moderation_stats(
+    window: Optional[str] = Query(None, description="Time window such as 15m, 24h or 7d; lifetime totals if omitted"),
+    bucket: Optional[Literal["minute", "hour"]] = Query(None, description="Series resolution; picked from the window if omitted"),
+    content_type: Optional[Literal["text", "image"]] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if window is None:
+        # Counters are maintained at write time, so this reads a few summary rows
+        try:
+            return await read_stats(db)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        window_seconds = parse_window(window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bucket = bucket or ("minute" if window_seconds <= 6 * 3600 else "hour")
+    bucket_seconds = 60 if bucket == "minute" else 3600
+    if window_seconds / bucket_seconds > STATS_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Window spans more than {STATS_MAX_BUCKETS} {bucket} buckets; use a coarser bucket")
     try:
-        redis_client = await get_redis()
-        cache_key = "moderation_stats"
-        cached_stats = await redis_client.get(cache_key)
-        if cached_stats:
-            return json.loads(cached_stats)
-        
-        total_count = db.query(ModerationResult).count()
-        flagged_count = db.query(ModerationResult).filter(ModerationResult.flagged == True).count()
-        non_flagged_count = total_count - flagged_count
-        
-        stats = {
-            "total_moderated": total_count,
-            "flagged_count": flagged_count,
-            "non_flagged_count": non_flagged_count,
-        }
-        
-        await redis_client.set(cache_key, json.dumps(stats), ex=300)
-        return stats
+        # Served from the pre-aggregated rollups, never from raw result rows
+        return await read_window_stats(db, window_seconds, bucket, content_type)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
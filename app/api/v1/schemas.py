@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, Field
+from app.core.config import BATCH_MAX_ITEMS, SEARCH_MAX_LIMIT
 
 class TextModerationRequest(BaseModel):
     text: str
@@ -8,3 +10,9 @@ class TextModerationResponse(BaseModel):
     text: str
     flagged: bool
     categories: dict
+
+class BatchTextModerationRequest(BaseModel):
+    items: List[TextModerationRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+class ResultLookupRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=SEARCH_MAX_LIMIT)
@@ -0,0 +1,85 @@
+"""
+Moderate a large NDJSON dump offline.
+
+    python -m app.cli.ingest dump.jsonl --field body --checkpoint dump.checkpoint
+
+Progress goes to stderr. The checkpoint file is rewritten after every batch;
+running the same command again resumes after the last fully processed line.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from app.core.config import INGEST_BATCH_SIZE, INGEST_CONCURRENCY
+from app.core.database import async_engine
+from app.core.http_client import close_http_client
+from app.services.ingest import IngestError, ingest_lines
+
+
+def read_checkpoint(path: str) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(f.read().strip() or 0)
+
+
+def write_checkpoint(path: str, line_number: int) -> None:
+    # Write-then-rename so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(line_number))
+    os.replace(tmp_path, path)
+
+
+async def file_lines(path: str):
+    with open(path, "rb") as f:
+        for line in f:
+            yield line
+
+
+async def run(args) -> int:
+    skip_lines = read_checkpoint(args.checkpoint)
+    if skip_lines:
+        print(f"Resuming after line {skip_lines}", file=sys.stderr)
+    started = time.monotonic()
+
+    def report(progress):
+        if args.checkpoint:
+            write_checkpoint(args.checkpoint, progress["checkpoint"])
+        rate = progress["moderated"] / max(time.monotonic() - started, 1e-9)
+        print(
+            f"line {progress['checkpoint']}: {progress['moderated']} moderated, "
+            f"{progress['flagged']} flagged, {progress['invalid']} skipped ({rate:.0f}/s)",
+            file=sys.stderr,
+        )
+
+    try:
+        progress = await ingest_lines(
+            file_lines(args.path), args.field, args.batch_size, args.concurrency, skip_lines, on_progress=report
+        )
+        if args.checkpoint:
+            write_checkpoint(args.checkpoint, progress["checkpoint"])
+        print(f"Done: {progress['lines']} lines, {progress['moderated']} moderated, {progress['invalid']} skipped", file=sys.stderr)
+        return 0
+    except IngestError as e:
+        print(f"Stopped: {e}. Re-run to resume after line {e.progress['checkpoint']}.", file=sys.stderr)
+        return 1
+    finally:
+        await close_http_client()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moderate the texts in an NDJSON file.")
+    parser.add_argument("path", help="NDJSON file, one JSON object per line")
+    parser.add_argument("--field", default="text", help="JSON key holding the text (default: text)")
+    parser.add_argument("--checkpoint", help="file recording progress, for resuming")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="batches in flight")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
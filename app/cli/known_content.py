@@ -0,0 +1,91 @@
+"""
+Manage the known-content blocklist and allowlist.
+
+    python -m app.cli.known_content block --text "buy followers now" --note spam
+    python -m app.cli.known_content allow --image logo.png
+    python -m app.cli.known_content block --text-file phrases.txt
+    python -m app.cli.known_content remove --image meme.jpg
+    python -m app.cli.known_content reload
+
+Changes are written to Postgres and every running API process and worker is
+told to reload its in-memory index.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.fingerprint import text_fingerprint
+from app.services.image_preprocess import prepare_image
+from app.services.known_content import add_known_content, publish_reload, remove_known_content
+
+
+def fingerprints(args) -> list:
+    """(content_type, fingerprint, dhash hex or None) for every text and image named on the command line."""
+    texts = list(args.text)
+    for path in args.text_file:
+        with open(path, encoding="utf-8") as f:
+            texts.extend(line.strip() for line in f if line.strip())
+    entries = [("text", text_fingerprint(text), None) for text in texts]
+    for path in args.image:
+        with open(path, "rb") as f:
+            prepared = prepare_image(f.read())
+        entries.append(("image", prepared.content_hash, f"{prepared.dhash:016x}"))
+    return entries
+
+
+async def run(args) -> int:
+    try:
+        if args.command in ("block", "allow"):
+            entries = fingerprints(args)
+            if not entries:
+                print("Nothing to add; pass --text, --text-file or --image", file=sys.stderr)
+                return 1
+            async with AsyncSessionLocal() as db:
+                await add_known_content(db, [
+                    {
+                        "content_type": content_type,
+                        "fingerprint": fingerprint,
+                        "dhash": dhash,
+                        "verdict": args.command,
+                        "categories": None,
+                        "note": args.note,
+                    }
+                    for content_type, fingerprint, dhash in entries
+                ])
+            print(f"{args.command}: {len(entries)} entries", file=sys.stderr)
+        elif args.command == "remove":
+            entries = fingerprints(args)
+            removed = 0
+            async with AsyncSessionLocal() as db:
+                for content_type in ("text", "image"):
+                    matching = [fingerprint for kind, fingerprint, _ in entries if kind == content_type]
+                    if matching:
+                        removed += await remove_known_content(db, content_type, matching)
+            print(f"Removed {removed} entries", file=sys.stderr)
+        await publish_reload()
+        return 0
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage known-content verdicts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (
+        ("block", "always flag this content"),
+        ("allow", "never flag this content"),
+        ("remove", "forget this content"),
+    ):
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("--text", action="append", default=[], help="text to match (normalized like the cache)")
+        sub.add_argument("--text-file", action="append", default=[], help="file with one text per line")
+        sub.add_argument("--image", action="append", default=[], help="image file; near-duplicates match too")
+        if command != "remove":
+            sub.add_argument("--note", help="why this content is listed")
+    commands.add_parser("reload", help="make running processes reload the index")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Collect items submitted concurrently and hand them to `handler` as one batch.
+
+    A batch is dispatched when it reaches `max_size` items, when adding an item
+    would exceed `max_bytes` (measured with `size_of`), or `max_wait` seconds
+    after its first item arrived. `handler` receives a list of items and must
+    return one result per item; results that are exceptions are raised to that
+    item's caller only.
+    """
+
+    def __init__(self, handler, max_size: int, max_wait: float, max_bytes: int = None, size_of=len):
+        self.handler = handler
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._pending = []
+        self._pending_bytes = 0
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        size = self.size_of(item) if self.max_bytes else 0
+        if self._pending and self.max_bytes and self._pending_bytes + size > self.max_bytes:
+            self._dispatch()
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_bytes += size
+
+        if len(self._pending) >= self.max_size or (self.max_bytes and self._pending_bytes >= self.max_bytes):
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
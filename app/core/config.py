@@ -0,0 +1,158 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Google API credentials and endpoints
+GOOGLE_MODERATION_API_KEY = os.getenv("GOOGLE_MODERATION_API_KEY")
+PERSPECTIVE_API_URL = os.getenv("PERSPECTIVE_API_URL", "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze")
+GOOGLE_VISION_API_URL = os.getenv("GOOGLE_VISION_API_URL", "https://vision.googleapis.com/v1/images:annotate")
+
+# Shared upstream HTTP client (connection pool per upstream host)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "2"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "200"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "100"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+# Async database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+# Moderation behaviour
+TOXICITY_THRESHOLD = float(os.getenv("TOXICITY_THRESHOLD", "0.5"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "3600"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_UPSTREAM_CONCURRENCY = int(os.getenv("BATCH_UPSTREAM_CONCURRENCY", "32"))
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", "50"))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "500"))
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))  # rows per server-side cursor fetch
+
+# Request coalescing for identical in-flight moderation requests
+COALESCE_LOCK_TTL_MS = int(os.getenv("COALESCE_LOCK_TTL_MS", "10000"))
+COALESCE_WAIT_TIMEOUT = float(os.getenv("COALESCE_WAIT_TIMEOUT", "6"))
+
+# Image verdict cache
+PHASH_ENABLED = os.getenv("PHASH_ENABLED", "true").lower() == "true"
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "4"))
+
+# In-process cache tier in front of Redis
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "10000"))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", "60"))
+
+# Write-behind persistence of moderation results
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL_MS = int(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "200"))
+WRITE_BEHIND_ENQUEUE_TIMEOUT = float(os.getenv("WRITE_BEHIND_ENQUEUE_TIMEOUT", "1"))
+WRITE_BEHIND_FLUSH_RETRIES = int(os.getenv("WRITE_BEHIND_FLUSH_RETRIES", "5"))  # before a failed batch is dropped
+WRITE_BEHIND_RETRY_BACKOFF_MS = int(os.getenv("WRITE_BEHIND_RETRY_BACKOFF_MS", "200"))  # doubles on each retry
+
+# Celery job workers
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
+CELERY_PREFETCH_MULTIPLIER = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "16"))
+CELERY_WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", "64"))  # task threads per worker process
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", "86400"))
+WORKER_TEXT_BATCH_SIZE = int(os.getenv("WORKER_TEXT_BATCH_SIZE", "100"))
+WORKER_BATCH_WINDOW_MS = int(os.getenv("WORKER_BATCH_WINDOW_MS", "20"))
+
+# Text scoring engine: "perspective" (Google API) or "local" (CPU model, works offline)
+TEXT_MODERATION_ENGINE = os.getenv("TEXT_MODERATION_ENGINE", "perspective").lower()
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")  # safetensors weights; built-in lexicon model if unset
+LOCAL_MODEL_BUCKETS = int(os.getenv("LOCAL_MODEL_BUCKETS", str(2 ** 18)))
+
+# Tiered text moderation: settle confident cases locally, escalate the rest to Perspective
+TIERED_MODERATION_ENABLED = os.getenv("TIERED_MODERATION_ENABLED", "false").lower() == "true"
+PRESCREEN_USE_LOCAL_MODEL = os.getenv("PRESCREEN_USE_LOCAL_MODEL", "true").lower() == "true"
+PRESCREEN_CLEAN_BELOW = float(os.getenv("PRESCREEN_CLEAN_BELOW", "0.05"))  # the built-in model puts term-free text at ~0.047
+PRESCREEN_FLAG_ABOVE = float(os.getenv("PRESCREEN_FLAG_ABOVE", "0.95"))
+PRESCREEN_LEXICON_SCORE = float(os.getenv("PRESCREEN_LEXICON_SCORE", "0.99"))
+PRESCREEN_LEXICON_PATH = os.getenv("PRESCREEN_LEXICON_PATH")  # extra blocking terms, one per line
+
+# Image preprocessing before the Vision upload
+IMAGE_PREPROCESS_EXECUTOR = os.getenv("IMAGE_PREPROCESS_EXECUTOR", "thread").lower()  # "thread" or "process"
+IMAGE_PREPROCESS_WORKERS = int(os.getenv("IMAGE_PREPROCESS_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1024"))
+IMAGE_UPLOAD_FORMAT = os.getenv("IMAGE_UPLOAD_FORMAT", "JPEG").upper()  # "JPEG" or "WEBP"
+IMAGE_UPLOAD_QUALITY = int(os.getenv("IMAGE_UPLOAD_QUALITY", "85"))
+
+# Micro-batching of concurrent image requests into multi-image Vision annotate calls
+VISION_BATCH_ENABLED = os.getenv("VISION_BATCH_ENABLED", "true").lower() == "true"
+VISION_BATCH_MAX_SIZE = int(os.getenv("VISION_BATCH_MAX_SIZE", "16"))  # Vision accepts at most 16 images per call
+VISION_BATCH_WINDOW_MS = int(os.getenv("VISION_BATCH_WINDOW_MS", "10"))
+VISION_BATCH_MAX_BYTES = int(os.getenv("VISION_BATCH_MAX_BYTES", str(7 * 1024 * 1024)))  # raw bytes, before base64
+
+# Shared upstream quota (Redis token bucket) and adaptive concurrency per upstream
+UPSTREAM_RATE_LIMIT_ENABLED = os.getenv("UPSTREAM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+PERSPECTIVE_QPS = float(os.getenv("PERSPECTIVE_QPS", "10"))
+PERSPECTIVE_BURST = float(os.getenv("PERSPECTIVE_BURST", str(PERSPECTIVE_QPS)))
+VISION_QPS = float(os.getenv("VISION_QPS", "30"))  # images per second
+VISION_BURST = float(os.getenv("VISION_BURST", str(VISION_QPS)))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", "2"))
+UPSTREAM_CONCURRENCY_INITIAL = int(os.getenv("UPSTREAM_CONCURRENCY_INITIAL", "32"))
+UPSTREAM_CONCURRENCY_MIN = int(os.getenv("UPSTREAM_CONCURRENCY_MIN", "2"))
+UPSTREAM_CONCURRENCY_MAX = int(os.getenv("UPSTREAM_CONCURRENCY_MAX", "256"))
+UPSTREAM_LATENCY_TARGET = float(os.getenv("UPSTREAM_LATENCY_TARGET", "1.5"))
+
+# Upstream resilience: circuit breaker, retry budget and hedged requests
+CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", "50"))  # most recent calls considered
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "20"))
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))  # retries allowed per request
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.1"))
+RETRY_BACKOFF_CAP = float(os.getenv("RETRY_BACKOFF_CAP", "1"))
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "50"))
+PERSPECTIVE_FALLBACK_LOCAL = os.getenv("PERSPECTIVE_FALLBACK_LOCAL", "false").lower() == "true"  # adds "local" after Perspective in TEXT_PROVIDERS
+
+# Moderation providers and routing per request type. Providers are comma-separated
+# names, optionally weighted ("perspective:9,local:1"); policies are "fallback"
+# (in order until one succeeds), "race" (all at once, first answer wins) and
+# "weighted" (random split by weight, falling back to the others on failure)
+TEXT_PROVIDERS = os.getenv(
+    "TEXT_PROVIDERS",
+    "perspective,local" if PERSPECTIVE_FALLBACK_LOCAL and TEXT_MODERATION_ENGINE == "perspective" else TEXT_MODERATION_ENGINE,
+)
+TEXT_PROVIDER_POLICY = os.getenv("TEXT_PROVIDER_POLICY", "fallback").lower()
+IMAGE_PROVIDERS = os.getenv("IMAGE_PROVIDERS", "vision")
+IMAGE_PROVIDER_POLICY = os.getenv("IMAGE_PROVIDER_POLICY", "fallback").lower()
+
+# Known-content blocklist/allowlist, held in memory and reloaded via Redis pub/sub
+KNOWN_CONTENT_ENABLED = os.getenv("KNOWN_CONTENT_ENABLED", "true").lower() == "true"
+KNOWN_CONTENT_RELOAD_RETRY_SECONDS = float(os.getenv("KNOWN_CONTENT_RELOAD_RETRY_SECONDS", "5"))
+
+# Minute/hour rollups behind the time-windowed /stats
+ROLLUP_AGGREGATOR_ENABLED = os.getenv("ROLLUP_AGGREGATOR_ENABLED", "true").lower() == "true"
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "10"))
+ROLLUP_BATCH_SIZE = int(os.getenv("ROLLUP_BATCH_SIZE", "10000"))
+ROLLUP_SETTLE_SECONDS = int(os.getenv("ROLLUP_SETTLE_SECONDS", "5"))  # let in-flight inserts commit first
+ROLLUP_GAP_TIMEOUT_SECONDS = int(os.getenv("ROLLUP_GAP_TIMEOUT_SECONDS", "600"))  # skipped ids still missing after this were rolled back
+ROLLUP_MAX_GAPS = int(os.getenv("ROLLUP_MAX_GAPS", "10000"))
+STATS_MAX_BUCKETS = int(os.getenv("STATS_MAX_BUCKETS", "5000"))
+
+# Bulk NDJSON ingest (API endpoint and CLI)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))  # batches in flight
+INGEST_MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", str(1024 * 1024)))
+
+# Logging: records go through a bounded in-memory queue to a background writer thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+LOG_FILE = os.getenv("LOG_FILE", "logs/moderaai.log")  # empty to log to stdout only
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))  # share of successful requests logged
+ACCESS_LOG_SLOW_SECONDS = float(os.getenv("ACCESS_LOG_SLOW_SECONDS", "1.0"))  # slower requests are always logged
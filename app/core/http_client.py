@@ -0,0 +1,55 @@
+import importlib.util
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import (
+    PERSPECTIVE_API_URL,
+    GOOGLE_VISION_API_URL,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_TIMEOUT,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+)
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+HTTP2_AVAILABLE = HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+# Shared asynchronous client, created once in the app lifespan
+http_client = None
+
+def _host_transport():
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncHTTPTransport(limits=limits, http2=HTTP2_AVAILABLE)
+
+def create_http_client():
+    """Build a client with one connection pool per upstream host."""
+    mounts = {}
+    for url in (PERSPECTIVE_API_URL, GOOGLE_VISION_API_URL):
+        parts = urlsplit(url)
+        mounts.setdefault(f"{parts.scheme}://{parts.netloc}", _host_transport())
+
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT)
+    return httpx.AsyncClient(mounts=mounts, transport=_host_transport(), timeout=timeout)
+
+async def init_http_client():
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+async def get_http_client():
+    return await init_http_client()
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
@@ -0,0 +1,161 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# HTTP requests, labelled by route template (e.g. /api/v1/moderation/{id}) to keep cardinality bounded
+HTTP_REQUESTS = Counter("http_requests_total", "Total number of HTTP requests", ["method", "endpoint", "http_status"])
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_latency_seconds",
+    "Latency of HTTP requests",
+    ["method", "endpoint"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Time spent per request stage: cache_lookup, upstream, db_write, preprocess
+STAGE_LATENCY = Histogram(
+    "moderation_stage_seconds",
+    "Time spent in each moderation stage",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Cache lookups per cache (text, image), tier (local, redis) and result (hit, miss)
+CACHE_REQUESTS = Counter(
+    "moderation_cache_requests_total",
+    "Verdict cache lookups by tier and result",
+    ["cache", "tier", "result"],
+)
+
+# Write-behind persistence buffer
+WRITE_BEHIND_QUEUE_SIZE = Gauge(
+    "moderation_write_behind_queue_rows",
+    "Rows waiting in the write-behind buffer",
+    multiprocess_mode="livesum",
+)
+WRITE_BEHIND_FLUSH_ROWS = Histogram(
+    "moderation_write_behind_flush_rows",
+    "Rows inserted per write-behind flush",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+WRITE_BEHIND_EVENTS = Counter(
+    "moderation_write_behind_events_total",
+    "Write-behind buffer events (backpressure fallbacks, flush retries, failed rows)",
+    ["event"],
+)
+
+# Tiered text moderation
+TIER_DECISIONS = Counter(
+    "moderation_tier_decisions_total",
+    "Text verdicts by deciding tier (prescreen or the provider name) and outcome (escalated = passed on to the next tier)",
+    ["tier", "outcome"],
+)
+TIER_LATENCY = Histogram(
+    "moderation_tier_latency_seconds",
+    "Time spent in each text moderation tier per call",
+    ["tier"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Moderation providers behind the text and image routers
+PROVIDER_CALLS = Counter(
+    "moderation_provider_calls_total",
+    "Provider calls by outcome (cancelled = lost a race)",
+    ["kind", "provider", "outcome"],
+)
+PROVIDER_LATENCY = Histogram(
+    "moderation_provider_latency_seconds",
+    "Latency of successful provider calls",
+    ["kind", "provider"],
+)
+
+# Known-content blocklist/allowlist
+KNOWN_CONTENT_LOOKUPS = Counter(
+    "moderation_known_content_lookups_total",
+    "Known-content index lookups by outcome (miss, block, allow)",
+    ["content_type", "outcome"],
+)
+KNOWN_CONTENT_ENTRIES = Gauge(
+    "moderation_known_content_entries",
+    "Entries in the in-memory known-content index",
+    ["content_type"],
+    multiprocess_mode="livemax",
+)
+
+# Image preprocessing (its duration is the "preprocess" stage)
+IMAGE_PAYLOAD_BYTES = Histogram(
+    "moderation_image_payload_bytes",
+    "Image size as uploaded by the client and as sent to Vision",
+    ["stage"],
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 20_000_000),
+)
+
+# Vision micro-batching
+VISION_BATCH_SIZE = Histogram(
+    "moderation_vision_batch_images",
+    "Images sent per Vision annotate call",
+    buckets=(1, 2, 4, 8, 12, 16),
+)
+
+# Upstream rate limiting and adaptive concurrency
+UPSTREAM_CONCURRENCY_LIMIT = Gauge(
+    "moderation_upstream_concurrency_limit",
+    "Current adaptive concurrency limit per upstream",
+    ["upstream"],
+    multiprocess_mode="liveall",
+)
+UPSTREAM_INFLIGHT = Gauge("moderation_upstream_inflight", "Upstream calls in flight", ["upstream"], multiprocess_mode="livesum")
+UPSTREAM_QUEUE_SECONDS = Histogram(
+    "moderation_upstream_queue_seconds",
+    "Time spent waiting for upstream capacity (concurrency slot and quota tokens)",
+    ["upstream"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+UPSTREAM_THROTTLE_EVENTS = Counter(
+    "moderation_upstream_throttle_events_total",
+    "Upstream 429 responses and requests rejected after their queue deadline",
+    ["upstream", "event"],
+)
+
+# Upstream resilience
+CIRCUIT_STATE = Gauge(
+    "moderation_circuit_state",
+    "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+    ["upstream"],
+    multiprocess_mode="livemax",
+)
+CIRCUIT_EVENTS = Counter(
+    "moderation_circuit_events_total",
+    "Circuit breaker transitions and calls rejected while open",
+    ["upstream", "event"],
+)
+UPSTREAM_RETRIES = Counter(
+    "moderation_upstream_retries_total",
+    "Upstream retries, and retries skipped because the retry budget was spent",
+    ["upstream", "outcome"],
+)
+HEDGE_REQUESTS = Counter(
+    "moderation_hedge_requests_total",
+    "Hedged upstream requests sent, and which attempt answered first",
+    ["upstream", "outcome"],
+)
+
+# Analytics rollups
+ROLLUP_ROWS = Counter("moderation_rollup_rows_total", "Moderation results folded into the minute/hour rollups")
+
+# Bulk ingest
+INGEST_LINES = Counter("moderation_ingest_lines_total", "NDJSON ingest lines by outcome", ["outcome"])
+
+# Logging pipeline
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full", ["level"])
+
+
+def render_metrics() -> bytes:
+    """
+    Metrics in the Prometheus text format. With PROMETHEUS_MULTIPROC_DIR set
+    (several uvicorn/gunicorn workers), values are merged across all worker processes.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
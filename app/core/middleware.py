@@ -0,0 +1,51 @@
+import time
+
+from app.core.logging_config import access_logger, should_log_access
+from app.core.metrics import HTTP_REQUESTS, HTTP_REQUEST_LATENCY
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records request count and latency once per
+    request. Requests are labelled by the matched route template (FastAPI
+    stores the route in the scope), so path parameters never create new
+    series; unmatched paths share a single label. Access log lines are
+    sampled (see should_log_access) and carry their fields as structured data.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            latency = time.perf_counter() - start
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(scope["method"], endpoint, status_code).inc()
+            HTTP_REQUEST_LATENCY.labels(scope["method"], endpoint).observe(latency)
+            if should_log_access(status_code, latency):
+                access_logger.info(
+                    f"{scope['method']} {scope['path']} {status_code} {latency:.4f}s",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": endpoint,
+                        "status": status_code,
+                        "latency_ms": round(latency * 1000, 2),
+                    },
+                )
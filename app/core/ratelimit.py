@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import random
+import time
+
+from app.core.cache import get_redis
+from app.core.metrics import (
+    UPSTREAM_CONCURRENCY_LIMIT,
+    UPSTREAM_INFLIGHT,
+    UPSTREAM_QUEUE_SECONDS,
+    UPSTREAM_THROTTLE_EVENTS,
+)
+
+# Refills the bucket from the Redis clock and either takes `requested` tokens
+# (returning 0) or returns how many milliseconds until enough tokens exist.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = math.ceil((requested - tokens) * 1000 / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class CapacityExceeded(Exception):
+    """Raised when no upstream capacity frees up before the request's deadline."""
+
+
+class TokenBucketLimiter:
+    """Token bucket stored in Redis, so every worker and pod draws from one quota."""
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        self.key = f"ratelimit:{name}"
+        self.rate = rate
+        self.capacity = capacity
+
+    async def acquire(self, tokens: float, deadline: float) -> None:
+        # The bucket never holds more than `capacity`, so a larger request
+        # (e.g. a Vision batch above the burst) takes a full bucket instead
+        tokens = min(tokens, self.capacity)
+        redis_client = await get_redis()
+        while True:
+            try:
+                wait_ms = await redis_client.eval(TOKEN_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity, tokens)
+            except Exception as e:
+                # Fail open: a Redis outage should not stop moderation entirely
+                logging.warning(f"Rate limiter unavailable, allowing request: {str(e)}")
+                return
+            if not wait_ms:
+                return
+            wait = int(wait_ms) / 1000
+            if time.monotonic() + wait > deadline:
+                raise CapacityExceeded(f"Upstream quota exhausted for {self.key}")
+            # Jitter spreads out waiters so they do not retry in lockstep
+            await asyncio.sleep(wait * (1 + random.random() * 0.2))
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit: grows by about one slot per round of fast calls and
+    shrinks multiplicatively when calls are throttled (429) or slower than the
+    latency target.
+    """
+
+    def __init__(self, name: str, initial: int, minimum: int, maximum: int, latency_target: float):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.inflight = 0
+        self._condition = asyncio.Condition()
+        UPSTREAM_CONCURRENCY_LIMIT.labels(name).set(self.limit)
+
+    async def acquire(self, deadline: float) -> None:
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.inflight < int(self.limit)),
+                    max(0.0, deadline - time.monotonic()),
+                )
+            except asyncio.TimeoutError:
+                raise CapacityExceeded(f"No {self.name} concurrency slot before deadline")
+            self.inflight += 1
+        UPSTREAM_INFLIGHT.labels(self.name).set(self.inflight)
+
+    async def release(self, latency: float = None, throttled: bool = False) -> None:
+        """Free the slot; `latency` is None when no upstream call was made, which leaves the limit alone."""
+        async with self._condition:
+            self.inflight -= 1
+            if latency is not None:
+                if throttled:
+                    self.limit = max(self.minimum, self.limit * 0.5)
+                elif latency > self.latency_target:
+                    self.limit = max(self.minimum, self.limit * 0.9)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+        UPSTREAM_INFLIGHT.labels(self.name).set(self.inflight)
+        UPSTREAM_CONCURRENCY_LIMIT.labels(self.name).set(self.limit)
+
+
+class UpstreamLimiter:
+    """
+    Waits, up to `queue_timeout`, for an adaptive concurrency slot and for quota
+    tokens before running an upstream call, then feeds the outcome back into the
+    concurrency limit.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, queue_timeout: float,
+                 initial: int, minimum: int, maximum: int, latency_target: float, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.queue_timeout = queue_timeout
+        self.bucket = TokenBucketLimiter(name, rate, burst)
+        self.concurrency = AdaptiveConcurrencyLimiter(name, initial, minimum, maximum, latency_target)
+
+    async def call(self, send, cost: float = 1):
+        """Run `send()` (returning an httpx response) within the limits."""
+        if not self.enabled:
+            return await send()
+
+        queued_at = time.monotonic()
+        deadline = queued_at + self.queue_timeout
+        try:
+            await self.concurrency.acquire(deadline)
+        except CapacityExceeded:
+            UPSTREAM_THROTTLE_EVENTS.labels(self.name, "rejected").inc()
+            raise
+
+        throttled = False
+        start = None
+        try:
+            await self.bucket.acquire(cost, deadline)
+            start = time.monotonic()
+            UPSTREAM_QUEUE_SECONDS.labels(self.name).observe(start - queued_at)
+            response = await send()
+            throttled = response.status_code == 429
+            if throttled:
+                UPSTREAM_THROTTLE_EVENTS.labels(self.name, "throttled").inc()
+            return response
+        except CapacityExceeded:
+            UPSTREAM_THROTTLE_EVENTS.labels(self.name, "rejected").inc()
+            raise
+        finally:
+            # A call rejected by the token bucket never reached the upstream, so it says nothing about its latency
+            latency = time.monotonic() - start if start is not None else None
+            await self.concurrency.release(latency, throttled)
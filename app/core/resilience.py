@@ -0,0 +1,223 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+import httpx
+
+from app.core.metrics import CIRCUIT_EVENTS, CIRCUIT_STATE, HEDGE_REQUESTS, UPSTREAM_RETRIES
+
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+_STATE_NAMES = {CLOSED: "closed", HALF_OPEN: "half_open", OPEN: "open"}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens when the failure rate over the last `window` calls reaches
+    `failure_rate` (after at least `min_calls`). After `open_seconds` one probe
+    call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float, open_seconds: float, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+        CIRCUIT_STATE.labels(name).set(CLOSED)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+    def _transition(self, state: int) -> None:
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(state)
+        CIRCUIT_EVENTS.labels(self.name, _STATE_NAMES[state]).inc()
+
+    def before_call(self) -> None:
+        if not self.enabled or self.state == CLOSED:
+            return
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        CIRCUIT_EVENTS.labels(self.name, "rejected").inc()
+        raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+
+    def record(self, success: bool) -> None:
+        if not self.enabled:
+            return
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self.outcomes.clear()
+            if success:
+                self._transition(CLOSED)
+            else:
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+            return
+
+        self.outcomes.append(success)
+        if self.state == CLOSED and len(self.outcomes) >= self.min_calls:
+            failures = self.outcomes.count(False)
+            if failures / len(self.outcomes) >= self.failure_rate:
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def abandon(self) -> None:
+        """Release the half-open probe slot when the call ended without an upstream outcome."""
+        self._probing = False
+
+
+class RetryBudget:
+    """
+    Allows retries up to `ratio` of the requests seen in the last `window`
+    seconds, with a floor of `min_per_second`, so retries cannot multiply
+    load on an upstream that is already failing.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_per_second * window
+        self.window = window
+        self.requests = deque()
+        self.retries = deque()
+
+    def _prune(self, now: float) -> None:
+        for events in (self.requests, self.retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self.requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        if len(self.retries) >= max(self.min_retries, self.ratio * len(self.requests)):
+            return False
+        self.retries.append(now)
+        return True
+
+
+class LatencyTracker:
+    """Recent successful call latencies, for choosing the hedge delay."""
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    return not task.cancelled() and task.exception() is None and task.result().status_code < 500
+
+
+class ResilientUpstream:
+    """
+    Runs upstream calls behind a circuit breaker, retries transient failures
+    (transport errors, 429 and 5xx) with jittered backoff while the retry
+    budget allows, and optionally hedges a slow call with a second attempt
+    once it has taken longer than the recent latency percentile.
+    """
+
+    def __init__(self, name: str, breaker: CircuitBreaker, retry_budget: RetryBudget, max_attempts: int,
+                 backoff_base: float, backoff_cap: float, hedge_enabled: bool = False,
+                 hedge_percentile: float = 95, hedge_min_delay: float = 0.05, hedge_min_samples: int = 50):
+        self.name = name
+        self.breaker = breaker
+        self.retry_budget = retry_budget
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = LatencyTracker()
+
+    async def _timed(self, send):
+        start = time.monotonic()
+        response = await send()
+        if response.status_code < 500:
+            self.latencies.observe(time.monotonic() - start)
+        return response
+
+    async def _attempt(self, send):
+        if not self.hedge_enabled or len(self.latencies.samples) < self.hedge_min_samples:
+            return await self._timed(send)
+
+        delay = max(self.hedge_min_delay, self.latencies.percentile(self.hedge_percentile))
+        primary = asyncio.ensure_future(self._timed(send))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future(self._timed(send))
+        HEDGE_REQUESTS.labels(self.name, "sent").inc()
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if _succeeded(task):
+                        HEDGE_REQUESTS.labels(self.name, "hedge_won" if task is hedge else "primary_won").inc()
+                        return task.result()
+            # Neither attempt succeeded; report the primary's outcome
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, send):
+        """Run `send()` (returning an httpx response) with breaker, retries and hedging."""
+        self.breaker.before_call()
+        self.retry_budget.record_request()
+        attempt = 1
+        while True:
+            try:
+                response = await self._attempt(send)
+            except httpx.TransportError:
+                self.breaker.record(False)
+                if not self._should_retry(attempt):
+                    raise
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            else:
+                self.breaker.record(response.status_code < 500)
+                if response.status_code not in RETRYABLE_STATUS or not self._should_retry(attempt):
+                    return response
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+            attempt += 1
+
+    def _should_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_attempts or self.breaker.is_open:
+            return False
+        if not self.retry_budget.try_spend():
+            UPSTREAM_RETRIES.labels(self.name, "budget_exhausted").inc()
+            return False
+        UPSTREAM_RETRIES.labels(self.name, "retried").inc()
+        return True
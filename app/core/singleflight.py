@@ -0,0 +1,82 @@
+import asyncio
+import time
+import uuid
+
+from app.core.cache import get_redis
+from app.core.config import COALESCE_LOCK_TTL_MS, COALESCE_WAIT_TIMEOUT
+
+# Deletes the lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one shared task within this process."""
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is None:
+            # Run as a task so a cancelled caller does not cancel the shared work
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+local_flights = SingleFlight()
+
+async def _wait_for_leader(redis_client, key, read_cached):
+    """Wait for another worker holding the lock to publish its result."""
+    pubsub = redis_client.pubsub()
+    try:
+        await pubsub.subscribe(f"singleflight:{key}")
+        # The leader may have finished before we subscribed
+        cached = await read_cached()
+        if cached is not None:
+            return cached
+
+        deadline = time.monotonic() + COALESCE_WAIT_TIMEOUT
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message is not None:
+                return await read_cached()
+        return None
+    finally:
+        await pubsub.aclose()
+
+async def _distributed(key, compute, read_cached):
+    redis_client = await get_redis()
+    lock_key = f"singleflight:lock:{key}"
+    token = uuid.uuid4().hex
+
+    if not await redis_client.set(lock_key, token, nx=True, px=COALESCE_LOCK_TTL_MS):
+        cached = await _wait_for_leader(redis_client, key, read_cached)
+        if cached is not None:
+            return cached
+        # Leader failed or timed out; compute the result ourselves
+
+    try:
+        return await compute()
+    finally:
+        await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        await redis_client.publish(f"singleflight:{key}", "done")
+
+async def coalesce(key, compute, read_cached):
+    """
+    Run `compute` once for concurrent identical requests.
+
+    Callers in this worker share one task; workers in other processes or pods
+    wait on a short Redis lock and pick up the leader's result through
+    `read_cached` once it publishes a notification. `compute` must write the
+    result where `read_cached` can find it.
+    """
+    return await local_flights.do(key, lambda: _distributed(key, compute, read_cached))
@@ -1,84 +1,62 @@
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-import time
+from fastapi import FastAPI, Response
 import sys
 import os
 import logging
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST  
+from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST
 from app.api.v1.routes import router
+from app.api.v1.jobs import router as jobs_router
+from app.core.http_client import init_http_client, close_http_client
+from app.core.metrics import render_metrics
+from app.core.logging_config import setup_logging
+from app.core.middleware import MetricsMiddleware
+from app.core.database import async_engine
+from app.services.result_writer import result_writer
+from app.services.rollups import rollup_aggregator
+from app.services.moderation import text_router
+from app.services.known_content import known_content
+from app.core.config import WRITE_BEHIND_ENABLED, ROLLUP_AGGREGATOR_ENABLED, KNOWN_CONTENT_ENABLED
+from app.services.local_model import get_local_model
+from app.services.image_preprocess import shutdown_executor
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-# Setup logging (console + file)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),  # Logs to console
-        logging.FileHandler("logs/moderaai.log"),  # Logs to file
-    ]
-)
+# Setup logging (console + file, written from a background thread)
+setup_logging()
 
-app = FastAPI(title="ModeraAI")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients on startup and release them on shutdown."""
+    await init_http_client()
+    if "local" in text_router.provider_names:
+        get_local_model()  # Load weights before the first request
+    if WRITE_BEHIND_ENABLED:
+        result_writer.start()
+    if ROLLUP_AGGREGATOR_ENABLED:
+        rollup_aggregator.start()
+    if KNOWN_CONTENT_ENABLED:
+        await known_content.start()  # load the index before serving
+    yield
+    await known_content.stop()
+    await rollup_aggregator.stop()
+    await result_writer.stop()
+    await close_http_client()
+    shutdown_executor()
+    await async_engine.dispose()
 
-app.include_router(router, prefix="/api/v1")
-
-# Prometheus Metrics
-REQUEST_COUNT = Counter("http_requests_total", "Total number of HTTP requests", ["method", "endpoint", "http_status"])
-REQUEST_LATENCY = Histogram("http_request_latency_seconds", "Latency of HTTP requests", ["method", "endpoint"])
-
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Update Prometheus Metrics
-        REQUEST_COUNT.labels(request.method, request.url.path, response.status_code).inc()
-        REQUEST_LATENCY.labels(request.method, request.url.path).observe(process_time)
-        
-        # Log request details
-        logging.info(
-            f"METHOD: {request.method} | PATH: {request.url.path} | STATUS: {response.status_code} | TIME: {process_time:.4f}s"
-        )
-        
-        return response
-
-# Add middleware to capture metrics for all routes
-app.add_middleware(PrometheusMiddleware)
+app = FastAPI(title="ModeraAI", lifespan=lifespan)
 
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-    """Middleware to measure request count and latency."""
-    start_time = time.time()
-    response = await call_next(request)
-    latency = time.time() - start_time
-
-    # Increment request counter
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.url.path,
-        http_status=response.status_code
-    ).inc()
-
-    # Record request latency
-    REQUEST_LATENCY.labels(
-        method=request.method,
-        endpoint=request.url.path
-    ).observe(latency)
-
-    # Log request details
-    logging.info(
-        f"METHOD: {request.method} | PATH: {request.url.path} | STATUS: {response.status_code} | LATENCY: {latency:.4f}s"
-    )
+app.include_router(router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
 
-    return response
+# One metrics layer for every request
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/metrics")
 async def metrics():
     """Expose Prometheus metrics."""
     logging.info("Metrics endpoint accessed.")
-    return Response(content=generate_latest(), media_type="text/plain")
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/health")
 async def health_check():
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Boolean, DateTime, Index, UniqueConstraint, cast, func, literal_column
 from app.core.database import Base
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION, JSONB
 
 class ModerationResult(Base):
     __tablename__ = "moderation_results"
@@ -11,6 +11,71 @@ class ModerationResult(Base):
     text = Column(String, nullable=False)
     flagged = Column(Boolean, default=False)
     categories = Column(JSONB) 
+    content_type = Column(String, nullable=False, default="text")  # "text" or "image"
+    created_at = Column(DateTime, server_default=func.now())
+
+# Text results store their score in categories; queries must use this exact expression to hit its index
+toxicity_score = cast(ModerationResult.categories.op("->>")(literal_column("'toxicity_score'")), DOUBLE_PRECISION)
+
+# Indexes behind the keyset-paginated search (newest first) and its filters
+Index("ix_moderation_results_created_at_id", ModerationResult.created_at.desc(), ModerationResult.id.desc())
+Index(
+    "ix_moderation_results_type_flagged_created_at",
+    ModerationResult.content_type,
+    ModerationResult.flagged,
+    ModerationResult.created_at.desc(),
+    ModerationResult.id.desc(),
+)
+Index(
+    "ix_moderation_results_categories",
+    ModerationResult.categories,
+    postgresql_using="gin",
+    postgresql_ops={"categories": "jsonb_path_ops"},
+)
+Index("ix_moderation_results_toxicity_score", toxicity_score)
+
+class ModerationStats(Base):
+    """Running result counts, bumped in the same transaction as each insert."""
+    __tablename__ = "moderation_stats"
+    content_type = Column(String, primary_key=True)
+    flagged = Column(Boolean, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+class RollupColumns:
+    """Per-bucket aggregates; the arrays are fixed-size histograms that add element-wise."""
+    bucket_start = Column(DateTime, primary_key=True)
+    content_type = Column(String, primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+    flagged = Column(BigInteger, nullable=False, default=0)
+    toxicity_histogram = Column(ARRAY(BigInteger), nullable=False)
+    safesearch_counts = Column(ARRAY(BigInteger), nullable=False)
+
+class ModerationRollupMinute(RollupColumns, Base):
+    __tablename__ = "moderation_rollups_minute"
+
+class ModerationRollupHour(RollupColumns, Base):
+    __tablename__ = "moderation_rollups_hour"
+
+class RollupWatermark(Base):
+    """Highest moderation_results id already folded into the rollups (single row)."""
+    __tablename__ = "moderation_rollup_watermark"
+    id = Column(SmallInteger, primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    # Ids below last_id that were not yet visible when it advanced: {id: first seen}
+    gaps = Column(JSONB, nullable=False, server_default="{}")
+
+class KnownContent(Base):
+    """Content with a fixed verdict, matched by fingerprint before the cache or any provider."""
+    __tablename__ = "known_content"
+    __table_args__ = (UniqueConstraint("content_type", "fingerprint", name="uq_known_content_fingerprint"),)
+    id = Column(Integer, primary_key=True)
+    content_type = Column(String, nullable=False)  # "text" or "image"
+    fingerprint = Column(String, nullable=False)  # text_fingerprint, or the image content SHA-256
+    dhash = Column(String(16))  # image perceptual hash (hex), for near-duplicate matches
+    verdict = Column(String, nullable=False)  # "block" or "allow"
+    categories = Column(JSONB)
+    note = Column(String)
+    created_at = Column(DateTime, server_default=func.now())
 
 class ModerationResultBase(BaseModel):
     content: str
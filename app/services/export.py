@@ -0,0 +1,80 @@
+import csv
+import io
+import zlib
+
+import orjson
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.moderation import ModerationResult
+from app.services.results_query import serialize_result
+
+CSV_COLUMNS = ("id", "text", "content_type", "flagged", "created_at", "categories")
+
+
+async def fetch_batches(filters: list, after_id: int, limit: int, fetch_size: int):
+    """
+    Yield matching results in id order, `fetch_size` rows at a time, from a
+    server-side cursor so only one batch is held in memory.
+    """
+    query = (
+        select(
+            ModerationResult.id,
+            ModerationResult.text,
+            ModerationResult.content_type,
+            ModerationResult.flagged,
+            ModerationResult.categories,
+            ModerationResult.created_at,
+        )
+        .where(*filters)
+        .order_by(ModerationResult.id)
+        .execution_options(yield_per=fetch_size)
+    )
+    if after_id is not None:
+        query = query.where(ModerationResult.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield [serialize_result(row) for row in partition]
+
+
+def _ndjson(rows: list) -> bytes:
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+def _csv(rows: list, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row["id"],
+            row["text"],
+            row["content_type"],
+            row["flagged"],
+            row["created_at"] or "",
+            orjson.dumps(row["categories"]).decode("utf-8"),
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def encode_export(batches, export_format: str, compress: bool):
+    """Serialize batches of result dicts to NDJSON or CSV chunks, gzip-compressed on the fly if asked."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 writes a gzip container
+    first = True
+    async for rows in batches:
+        chunk = _ndjson(rows) if export_format == "ndjson" else _csv(rows, header=first)
+        first = False
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if export_format == "csv" and first:
+        header = _csv([], header=True)
+        yield compressor.compress(header) if compressor else header
+    if compressor:
+        yield compressor.flush()
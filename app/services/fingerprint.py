@@ -0,0 +1,39 @@
+import hashlib
+import unicodedata
+from PIL import Image
+
+DHASH_SIZE = 8  # 8x8 comparisons -> 64-bit hash
+
+
+def normalize_text(text: str) -> str:
+    """Fold Unicode compatibility forms, case and runs of whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def text_fingerprint(text: str) -> str:
+    """Fixed-size (128-bit) digest of the normalized text."""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def image_content_hash(image: Image.Image) -> str:
+    """SHA-256 of the decoded pixels, so container metadata and filenames do not matter."""
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def image_dhash(image: Image.Image) -> int:
+    """64-bit difference hash; resized or re-encoded copies land within a few bits."""
+    small = image.convert("L").resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
@@ -0,0 +1,86 @@
+import json
+import time
+
+from app.core.cache import get_redis
+from app.core.config import RESULT_CACHE_TTL, PHASH_ENABLED, PHASH_MAX_DISTANCE
+from app.services.fingerprint import hamming_distance
+
+HASH_BITS = 64
+
+
+def image_cache_key(content_hash: str) -> str:
+    return f"moderation:image:{content_hash}"
+
+
+def dhash_bands(dhash: int):
+    """
+    Split the hash into PHASH_MAX_DISTANCE + 1 bands. Two hashes within the max
+    distance must agree exactly on at least one band, so only hashes sharing a
+    band need a full Hamming comparison.
+    """
+    count = PHASH_MAX_DISTANCE + 1
+    width, extra = divmod(HASH_BITS, count)
+    shift = HASH_BITS
+    for index in range(count):
+        size = width + (1 if index < extra else 0)
+        shift -= size
+        yield index, (dhash >> shift) & ((1 << size) - 1)
+
+
+def _band_key(index: int, value: int) -> str:
+    # Sorted set of dhashes scored by insert time (the older set-based bands used "phash:band")
+    return f"moderation:image:dhash:band:{index}:{value:x}"
+
+
+def _dhash_key(dhash: int) -> str:
+    return f"moderation:image:dhash:{dhash:016x}"
+
+
+async def lookup_image_verdict(content_hash: str, dhash: int):
+    """Return a cached verdict for an identical or perceptually near-identical image."""
+    redis_client = await get_redis()
+    cached_result = await redis_client.get(image_cache_key(content_hash))
+    if cached_result:
+        return json.loads(cached_result)
+    if not PHASH_ENABLED:
+        return None
+
+    # Band members older than the TTL have lost their verdict; skip them until they are trimmed
+    oldest = time.time() - RESULT_CACHE_TTL
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for index, value in dhash_bands(dhash):
+            pipe.zrangebyscore(_band_key(index, value), oldest, "+inf")
+        band_members = await pipe.execute()
+
+    candidates = {int(member, 16) for members in band_members for member in members}
+    nearest = sorted(
+        (distance, candidate)
+        for candidate in candidates
+        if (distance := hamming_distance(dhash, candidate)) <= PHASH_MAX_DISTANCE
+    )
+    if not nearest:
+        return None
+    # Each dhash keeps its own copy of the verdict, so one MGET resolves every candidate
+    verdicts = await redis_client.mget([_dhash_key(candidate) for _, candidate in nearest])
+    for cached_result in verdicts:
+        if cached_result:
+            return json.loads(cached_result)
+    return None
+
+
+async def store_image_verdict(content_hash: str, dhash: int, moderation_result: dict) -> None:
+    """Cache a verdict by content hash and add its perceptual hash to the shared index."""
+    redis_client = await get_redis()
+    verdict = json.dumps(moderation_result)
+    now = time.time()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.setex(image_cache_key(content_hash), RESULT_CACHE_TTL, verdict)
+        if PHASH_ENABLED:
+            pipe.setex(_dhash_key(dhash), RESULT_CACHE_TTL, verdict)
+            for index, value in dhash_bands(dhash):
+                band_key = _band_key(index, value)
+                pipe.zadd(band_key, {f"{dhash:016x}": now})
+                # Trim members whose verdicts have expired, so a hot band stays bounded
+                pipe.zremrangebyscore(band_key, "-inf", now - RESULT_CACHE_TTL)
+                pipe.expire(band_key, RESULT_CACHE_TTL)
+        await pipe.execute()
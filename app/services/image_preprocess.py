@@ -0,0 +1,85 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import NamedTuple
+
+from PIL import Image
+
+from app.core.config import (
+    IMAGE_PREPROCESS_EXECUTOR,
+    IMAGE_PREPROCESS_WORKERS,
+    IMAGE_MAX_DIMENSION,
+    IMAGE_UPLOAD_FORMAT,
+    IMAGE_UPLOAD_QUALITY,
+)
+from app.core.metrics import IMAGE_PAYLOAD_BYTES, STAGE_LATENCY
+from app.services.fingerprint import image_content_hash, image_dhash
+
+
+class PreparedImage(NamedTuple):
+    content_hash: str
+    dhash: int
+    payload: bytes  # compact re-encoded image sent to Vision
+    width: int
+    height: int
+
+
+def prepare_image(image_bytes: bytes, max_dimension: int = IMAGE_MAX_DIMENSION,
+                  upload_format: str = IMAGE_UPLOAD_FORMAT, quality: int = IMAGE_UPLOAD_QUALITY) -> PreparedImage:
+    """
+    Validate and decode an upload, fingerprint it and re-encode a downscaled
+    copy for Vision. CPU-bound; run it through `preprocess_image` from async code.
+    Raises PIL errors for invalid images.
+    """
+    Image.open(io.BytesIO(image_bytes)).verify()
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+
+    content_hash = image_content_hash(image)
+    dhash = image_dhash(image)
+
+    resized = max(image.size) > max_dimension
+    if resized:
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, upload_format, quality=quality)
+    payload = buffer.getvalue()
+    # A small original can already be more compact than our re-encode
+    if not resized and len(image_bytes) <= len(payload):
+        payload = image_bytes
+    return PreparedImage(content_hash, dhash, payload, image.width, image.height)
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        if IMAGE_PREPROCESS_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=IMAGE_PREPROCESS_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_PREPROCESS_WORKERS, thread_name_prefix="image-preprocess")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def preprocess_image(image_bytes: bytes) -> PreparedImage:
+    """Run `prepare_image` in the preprocessing pool, keeping the event loop free."""
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    prepared = await loop.run_in_executor(get_executor(), prepare_image, image_bytes)
+    STAGE_LATENCY.labels("preprocess").observe(time.perf_counter() - start)
+    IMAGE_PAYLOAD_BYTES.labels("original").observe(len(image_bytes))
+    IMAGE_PAYLOAD_BYTES.labels("upload").observe(len(prepared.payload))
+    return prepared
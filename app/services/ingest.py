@@ -0,0 +1,101 @@
+import asyncio
+from collections import deque
+
+import orjson
+
+from app.core.metrics import INGEST_LINES
+from app.services.moderation import moderate_texts
+
+
+class IngestError(Exception):
+    """Raised when a batch fails; `progress` holds the counts and resumable checkpoint so far."""
+
+    def __init__(self, message: str, progress: dict):
+        super().__init__(message)
+        self.progress = progress
+
+
+async def iter_lines(chunks, max_line_bytes: int):
+    """Split an async stream of byte chunks into lines without buffering more than one line."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Line longer than {max_line_bytes} bytes")
+    if buffer:
+        yield buffer
+
+
+def extract_text(line, text_field: str):
+    """The text to moderate from one NDJSON line, or None if the line is blank, invalid or has no text."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    text = record.get(text_field) if isinstance(record, dict) else None
+    return text if isinstance(text, str) and text.strip() else None
+
+
+async def ingest_lines(lines, text_field: str, batch_size: int, concurrency: int, skip_lines: int = 0, on_progress=None) -> dict:
+    """
+    Moderate the `text_field` of every NDJSON line. Lines are grouped into
+    batches for moderate_texts (one cache lookup, concurrent scoring of misses
+    and one bulk insert per batch) with at most `concurrency` batches in flight,
+    so memory stays bounded however long the input is.
+
+    `checkpoint` in the returned progress is the number of leading lines fully
+    processed; pass it back as `skip_lines` to resume.
+    """
+    progress = {"lines": skip_lines, "moderated": 0, "flagged": 0, "invalid": 0, "checkpoint": skip_lines}
+    inflight = deque()  # (last line number, task), in input order
+
+    async def settle_oldest():
+        last_line, task = inflight.popleft()
+        try:
+            results = await task
+        except Exception as e:
+            raise IngestError(str(e), dict(progress)) from e
+        flagged = sum(result["flagged"] for result in results)
+        progress["moderated"] += len(results)
+        progress["flagged"] += flagged
+        progress["checkpoint"] = last_line
+        INGEST_LINES.labels("moderated").inc(len(results))
+        if on_progress:
+            on_progress(dict(progress))
+
+    batch = []
+    line_number = 0
+    try:
+        async for line in lines:
+            line_number += 1
+            if line_number <= skip_lines:
+                continue
+            progress["lines"] = line_number
+            text = extract_text(line, text_field)
+            if text is None:
+                progress["invalid"] += 1
+                INGEST_LINES.labels("invalid").inc()
+                continue
+            batch.append(text)
+            if len(batch) >= batch_size:
+                if len(inflight) >= concurrency:
+                    await settle_oldest()
+                inflight.append((line_number, asyncio.create_task(moderate_texts(batch))))
+                batch = []
+
+        if batch:
+            inflight.append((line_number, asyncio.create_task(moderate_texts(batch))))
+        while inflight:
+            await settle_oldest()
+    finally:
+        # On failure or cancellation, stop batches past the checkpoint
+        for _, task in inflight:
+            task.cancel()
+    progress["checkpoint"] = max(line_number, skip_lines)
+    return progress
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.core.config import (
+    KNOWN_CONTENT_RELOAD_RETRY_SECONDS,
+    PHASH_ENABLED,
+    PHASH_MAX_DISTANCE,
+)
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import KNOWN_CONTENT_ENTRIES, KNOWN_CONTENT_LOOKUPS
+from app.models.moderation import KnownContent
+from app.services.fingerprint import hamming_distance
+from app.services.image_cache import dhash_bands
+
+RELOAD_CHANNEL = "moderation:known_content:reload"
+
+
+def verdict_result(verdict: str, categories: dict) -> dict:
+    """The moderation verdict for a known entry; `known_content` in categories marks where it came from."""
+    return {"flagged": verdict == "block", "categories": {**(categories or {}), "known_content": verdict}}
+
+
+class KnownContentIndex:
+    """
+    Immutable snapshot of the known-content table: exact fingerprint maps for
+    text and images, plus perceptual-hash bands for near-duplicate images.
+    Lookups are pure in-memory work.
+    """
+
+    def __init__(self, rows=()):
+        self.texts = {}
+        self.images = {}
+        self.bands = {}  # (band index, band value) -> [(dhash, result)]
+        for content_type, fingerprint, dhash, verdict, categories in rows:
+            result = verdict_result(verdict, categories)
+            if content_type == "text":
+                self.texts[fingerprint] = result
+            else:
+                self.images[fingerprint] = result
+                if dhash:
+                    value = int(dhash, 16)
+                    for band in dhash_bands(value):
+                        self.bands.setdefault(band, []).append((value, result))
+
+    def match_text(self, fingerprint: str):
+        return self.texts.get(fingerprint)
+
+    def match_image(self, content_hash: str, dhash: int):
+        result = self.images.get(content_hash)
+        if result:
+            return result
+        if not PHASH_ENABLED or not self.bands:
+            return None
+        # Near-duplicates share at least one band with the original (see dhash_bands)
+        nearest = None
+        for band in dhash_bands(dhash):
+            for candidate, result in self.bands.get(band, ()):
+                distance = hamming_distance(dhash, candidate)
+                if distance <= PHASH_MAX_DISTANCE and (nearest is None or distance < nearest[0]):
+                    nearest = (distance, result)
+        return nearest[1] if nearest else None
+
+
+class KnownContentStore:
+    """
+    The process-wide known-content index. It is loaded from Postgres on start
+    and reloaded whenever a message arrives on RELOAD_CHANNEL; each reload
+    swaps in a new snapshot, so lookups never see a half-built index.
+    """
+
+    def __init__(self):
+        self.index = KnownContentIndex()
+        self.stale = True  # the index may be missing changes and needs a reload
+        self._task = None
+
+    def match_text(self, fingerprint: str):
+        result = self.index.match_text(fingerprint)
+        KNOWN_CONTENT_LOOKUPS.labels("text", _outcome(result)).inc()
+        return result
+
+    def match_image(self, content_hash: str, dhash: int):
+        result = self.index.match_image(content_hash, dhash)
+        KNOWN_CONTENT_LOOKUPS.labels("image", _outcome(result)).inc()
+        return result
+
+    async def reload(self) -> None:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(
+                KnownContent.content_type,
+                KnownContent.fingerprint,
+                KnownContent.dhash,
+                KnownContent.verdict,
+                KnownContent.categories,
+            ))).all()
+        self.index = KnownContentIndex(rows)
+        self.stale = False
+        KNOWN_CONTENT_ENTRIES.labels("text").set(len(self.index.texts))
+        KNOWN_CONTENT_ENTRIES.labels("image").set(len(self.index.images))
+        logging.info(f"Loaded {len(self.index.texts)} known texts and {len(self.index.images)} known images")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        try:
+            await self.reload()
+        except Exception:
+            # Serve without the index rather than refusing to start; the listener retries
+            logging.exception("Loading known content failed")
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _listen(self):
+        while True:
+            try:
+                redis_client = await get_redis()
+                pubsub = redis_client.pubsub()
+                try:
+                    await pubsub.subscribe(RELOAD_CHANNEL)
+                    if self.stale:
+                        await self.reload()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            await self.reload()
+                finally:
+                    await pubsub.aclose()
+            except Exception:
+                # Reload after reconnecting; changes may have been published meanwhile
+                logging.exception("Known content listener failed; retrying")
+                self.stale = True
+                await asyncio.sleep(KNOWN_CONTENT_RELOAD_RETRY_SECONDS)
+
+
+def _outcome(result) -> str:
+    if result is None:
+        return "miss"
+    return "block" if result["flagged"] else "allow"
+
+
+known_content = KnownContentStore()
+
+
+async def add_known_content(db: AsyncSession, entries: list) -> None:
+    """
+    Insert or replace known-content rows (dicts with content_type, fingerprint,
+    verdict and optionally dhash, categories and note). Call publish_reload
+    afterwards so running processes pick them up. Repeated fingerprints keep
+    their last entry; Postgres rejects an upsert that touches a row twice.
+    """
+    entries = list({(entry["content_type"], entry["fingerprint"]): entry for entry in entries}.values())
+    stmt = pg_insert(KnownContent).values(entries)
+    await db.execute(stmt.on_conflict_do_update(
+        constraint="uq_known_content_fingerprint",
+        set_={column: stmt.excluded[column] for column in ("dhash", "verdict", "categories", "note")},
+    ))
+    await db.commit()
+
+
+async def remove_known_content(db: AsyncSession, content_type: str, fingerprints: list) -> int:
+    result = await db.execute(
+        delete(KnownContent).where(KnownContent.content_type == content_type, KnownContent.fingerprint.in_(fingerprints))
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def publish_reload() -> None:
+    """Tell every API process to reload the known-content index."""
+    redis_client = await get_redis()
+    await redis_client.publish(RELOAD_CHANNEL, "reload")
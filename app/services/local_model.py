@@ -0,0 +1,92 @@
+import re
+import zlib
+
+import numpy as np
+
+from app.core.config import LOCAL_MODEL_PATH, LOCAL_MODEL_BUCKETS
+from app.services.fingerprint import normalize_text
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Seed terms for the built-in model used when no trained weights are configured
+DEFAULT_LEXICON = {
+    "idiot": 3.5, "idiots": 3.5, "stupid": 3.0, "moron": 3.5, "dumb": 2.5, "loser": 2.5,
+    "pathetic": 2.0, "disgusting": 2.0, "trash": 1.5, "ugly": 1.5, "hate": 2.0, "kill": 3.0,
+    "die": 2.5, "fuck": 4.0, "fucking": 4.0, "shit": 3.0, "bitch": 4.0, "bastard": 3.5,
+    "asshole": 4.0, "crap": 1.5, "retard": 4.0, "scum": 3.0, "worthless": 2.5,
+    "shut up": 2.5, "go die": 4.0, "kill yourself": 6.0,
+}
+
+
+def _features(text: str) -> list:
+    """Word unigrams and bigrams of the normalized text."""
+    tokens = TOKEN_PATTERN.findall(normalize_text(text))
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class HashedNgramModel:
+    """
+    Logistic regression over hashed word n-grams. Scoring a batch builds one
+    flat index array for all texts and reduces it with NumPy, so the per-item
+    cost is tokenization plus a few vector operations.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float):
+        self.weights = weights.astype(np.float32)
+        self.bias = np.float32(bias)
+        self.buckets = len(weights)
+
+    def _index(self, feature: str) -> int:
+        return zlib.crc32(feature.encode("utf-8")) % self.buckets
+
+    def score(self, texts: list) -> np.ndarray:
+        """Return a toxicity probability per text."""
+        indices = []
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        for i, text in enumerate(texts):
+            features = _features(text)
+            indices.extend(self._index(feature) for feature in features)
+            offsets[i + 1] = offsets[i] + len(features)
+
+        totals = np.zeros(len(texts), dtype=np.float32)
+        if indices:
+            contributions = self.weights[np.asarray(indices, dtype=np.int64)]
+            sums = np.add.reduceat(contributions, np.minimum(offsets[:-1], len(indices) - 1))
+            # reduceat yields the following element for empty segments, so zero them
+            totals = np.where(offsets[1:] > offsets[:-1], sums, 0).astype(np.float32)
+        return 1.0 / (1.0 + np.exp(-(totals + self.bias)))
+
+    def save(self, path: str) -> None:
+        from safetensors.numpy import save_file
+        save_file({"weight": self.weights, "bias": np.array([self.bias], dtype=np.float32)}, path)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramModel":
+        from safetensors.numpy import load_file
+        tensors = load_file(path)
+        return cls(tensors["weight"], float(tensors["bias"][0]))
+
+    @classmethod
+    def from_lexicon(cls, lexicon: dict, buckets: int, bias: float = -3.0) -> "HashedNgramModel":
+        """Build weights that put each term's weight on its own (highest-order) n-gram."""
+        model = cls(np.zeros(buckets, dtype=np.float32), bias)
+        for term, weight in lexicon.items():
+            model.weights[model._index(normalize_text(term))] += weight
+        return model
+
+
+_model = None
+
+
+def get_local_model() -> HashedNgramModel:
+    global _model
+    if _model is None:
+        if LOCAL_MODEL_PATH:
+            _model = HashedNgramModel.load(LOCAL_MODEL_PATH)
+        else:
+            _model = HashedNgramModel.from_lexicon(DEFAULT_LEXICON, LOCAL_MODEL_BUCKETS)
+    return _model
+
+
+def score_texts_locally(texts: list) -> list:
+    return [float(score) for score in get_local_model().score(texts)]
@@ -0,0 +1,428 @@
+import asyncio
+import base64
+import time
+import httpx
+
+from app.core.batching import MicroBatcher
+from app.core.cache import VerdictCache
+from app.core.config import (
+    GOOGLE_MODERATION_API_KEY,
+    PERSPECTIVE_API_URL,
+    GOOGLE_VISION_API_URL,
+    TOXICITY_THRESHOLD,
+    RESULT_CACHE_TTL,
+    LOCAL_CACHE_MAX_ENTRIES,
+    LOCAL_CACHE_TTL,
+    BATCH_UPSTREAM_CONCURRENCY,
+    TIERED_MODERATION_ENABLED,
+    VISION_BATCH_ENABLED,
+    VISION_BATCH_MAX_SIZE,
+    VISION_BATCH_WINDOW_MS,
+    VISION_BATCH_MAX_BYTES,
+    UPSTREAM_RATE_LIMIT_ENABLED,
+    PERSPECTIVE_QPS,
+    PERSPECTIVE_BURST,
+    VISION_QPS,
+    VISION_BURST,
+    UPSTREAM_QUEUE_TIMEOUT,
+    UPSTREAM_CONCURRENCY_INITIAL,
+    UPSTREAM_CONCURRENCY_MIN,
+    UPSTREAM_CONCURRENCY_MAX,
+    UPSTREAM_LATENCY_TARGET,
+    CIRCUIT_BREAKER_ENABLED,
+    CIRCUIT_BREAKER_WINDOW,
+    CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_FAILURE_RATE,
+    CIRCUIT_BREAKER_OPEN_SECONDS,
+    UPSTREAM_MAX_ATTEMPTS,
+    RETRY_BUDGET_RATIO,
+    RETRY_BUDGET_MIN_PER_SECOND,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_CAP,
+    HEDGE_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    TEXT_PROVIDERS,
+    TEXT_PROVIDER_POLICY,
+    IMAGE_PROVIDERS,
+    IMAGE_PROVIDER_POLICY,
+    KNOWN_CONTENT_ENABLED,
+)
+from app.core.http_client import get_http_client
+from app.core.metrics import STAGE_LATENCY, TIER_DECISIONS, TIER_LATENCY, VISION_BATCH_SIZE
+from app.core.ratelimit import CapacityExceeded, UpstreamLimiter
+from app.core.resilience import CircuitBreaker, CircuitOpen, ResilientUpstream, RetryBudget
+from app.core.singleflight import coalesce
+from app.services.fingerprint import text_fingerprint
+from app.services.image_preprocess import PreparedImage
+from app.services.image_cache import lookup_image_verdict, store_image_verdict
+from app.services.known_content import known_content
+from app.services.local_model import score_texts_locally
+from app.services.prescreen import prescreen
+from app.services.providers import FakeImageProvider, FakeTextProvider, ImageProvider, TextProvider, build_router
+from app.services.result_writer import save_results
+
+
+class UpstreamError(Exception):
+    """Raised when a Google moderation API call fails or returns an unexpected body."""
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _upstream_limiter(name: str, rate: float, burst: float) -> UpstreamLimiter:
+    return UpstreamLimiter(
+        name,
+        rate=rate,
+        burst=burst,
+        queue_timeout=UPSTREAM_QUEUE_TIMEOUT,
+        initial=UPSTREAM_CONCURRENCY_INITIAL,
+        minimum=UPSTREAM_CONCURRENCY_MIN,
+        maximum=UPSTREAM_CONCURRENCY_MAX,
+        latency_target=UPSTREAM_LATENCY_TARGET,
+        enabled=UPSTREAM_RATE_LIMIT_ENABLED,
+    )
+
+
+def _resilient_upstream(name: str) -> ResilientUpstream:
+    breaker = CircuitBreaker(
+        name,
+        window=CIRCUIT_BREAKER_WINDOW,
+        min_calls=CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate=CIRCUIT_BREAKER_FAILURE_RATE,
+        open_seconds=CIRCUIT_BREAKER_OPEN_SECONDS,
+        enabled=CIRCUIT_BREAKER_ENABLED,
+    )
+    return ResilientUpstream(
+        name,
+        breaker,
+        RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_PER_SECOND),
+        max_attempts=UPSTREAM_MAX_ATTEMPTS,
+        backoff_base=RETRY_BACKOFF_BASE,
+        backoff_cap=RETRY_BACKOFF_CAP,
+        hedge_enabled=HEDGE_ENABLED,
+        hedge_percentile=HEDGE_PERCENTILE,
+        hedge_min_delay=HEDGE_MIN_DELAY,
+        hedge_min_samples=HEDGE_MIN_SAMPLES,
+    )
+
+
+# Google quotas are per project, so every worker and pod shares one bucket per API
+perspective_limiter = _upstream_limiter("perspective", PERSPECTIVE_QPS, PERSPECTIVE_BURST)
+vision_limiter = _upstream_limiter("vision", VISION_QPS, VISION_BURST)
+perspective_upstream = _resilient_upstream("perspective")
+vision_upstream = _resilient_upstream("vision")
+
+
+async def _post(upstream: ResilientUpstream, limiter: UpstreamLimiter, url: str, payload: dict, cost: float = 1):
+    """POST to a Google API; every attempt (retries and hedges included) is rate-limited."""
+    http_client = await get_http_client()
+    with STAGE_LATENCY.labels("upstream").time():
+        return await upstream.call(lambda: limiter.call(
+            lambda: http_client.post(url, params={"key": GOOGLE_MODERATION_API_KEY}, json=payload),
+            cost=cost,
+        ))
+
+
+# Text verdicts keyed by a digest of the normalized text; the text itself is not stored
+text_verdicts = VerdictCache("text", RESULT_CACHE_TTL, LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_TTL)
+
+
+def text_cache_key(text: str) -> str:
+    return f"moderation:text:{text_fingerprint(text)}"
+
+
+def text_verdict(moderation_result: dict) -> dict:
+    return {"flagged": moderation_result["flagged"], "categories": moderation_result["categories"]}
+
+
+def build_text_result(text: str, toxicity_score: float) -> dict:
+    return {
+        "text": text,
+        "flagged": toxicity_score > TOXICITY_THRESHOLD,
+        "categories": {"toxicity_score": toxicity_score},
+    }
+
+
+async def perspective_score(text: str) -> float:
+    """Return the Perspective TOXICITY summary score for a piece of text."""
+    request_data = {
+        "comment": {"text": text},
+        "languages": ["en"],
+        "requestedAttributes": {"TOXICITY": {}}
+    }
+    try:
+        response = await _post(perspective_upstream, perspective_limiter, PERSPECTIVE_API_URL, request_data)
+        response.raise_for_status()  # Raises error for non-200 responses
+        result = response.json()
+        return result["attributeScores"]["TOXICITY"]["summaryScore"]["value"]
+    except (CapacityExceeded, CircuitOpen) as e:
+        raise UpstreamError(str(e), status_code=503) from e
+    except httpx.HTTPError as e:
+        raise UpstreamError(f"External API error: {str(e)}") from e
+    except (KeyError, TypeError, ValueError) as e:
+        raise UpstreamError(f"Unexpected response: {str(e)}") from e
+
+
+def build_image_result(filename: str, annotations: dict) -> dict:
+    flagged = annotations.get("adult") in ["LIKELY", "VERY_LIKELY"] or annotations.get("violence") in ["LIKELY", "VERY_LIKELY"]
+    return {
+        "filename": filename,
+        "flagged": flagged,
+        "categories": annotations,
+    }
+
+
+async def annotate_images(images: list) -> list:
+    """
+    Send several images to Vision in one annotate call. Returns, per image,
+    its SafeSearch annotation or an UpstreamError for that image alone.
+    """
+    if not GOOGLE_MODERATION_API_KEY:
+        raise UpstreamError("Google Moderation API key is missing; image moderation is unavailable.")
+    vision_request = {
+        "requests": [{
+            "image": {"content": base64.b64encode(image_bytes).decode("utf-8")},
+            "features": [{"type": "SAFE_SEARCH_DETECTION"}]
+        } for image_bytes in images]
+    }
+    VISION_BATCH_SIZE.observe(len(images))
+    try:
+        response = await _post(vision_upstream, vision_limiter, GOOGLE_VISION_API_URL, vision_request, cost=len(images))
+        response.raise_for_status()
+        responses = response.json()["responses"]
+    except (CapacityExceeded, CircuitOpen) as e:
+        raise UpstreamError(str(e), status_code=503) from e
+    except httpx.HTTPError as e:
+        raise UpstreamError(f"External API error: {str(e)}") from e
+    except (KeyError, TypeError, ValueError) as e:
+        raise UpstreamError(f"Unexpected response: {str(e)}") from e
+    if len(responses) != len(images):
+        raise UpstreamError(f"Unexpected response: {len(responses)} annotations for {len(images)} images")
+
+    annotations = []
+    for entry in responses:
+        if "safeSearchAnnotation" in entry:
+            annotations.append(entry["safeSearchAnnotation"])
+        else:
+            error = entry.get("error", {}).get("message", "missing safeSearchAnnotation")
+            annotations.append(UpstreamError(f"Unexpected response: {error}"))
+    return annotations
+
+
+# Concurrent image requests are collected briefly and sent as one annotate call
+vision_batcher = MicroBatcher(
+    annotate_images,
+    max_size=VISION_BATCH_MAX_SIZE,
+    max_wait=VISION_BATCH_WINDOW_MS / 1000,
+    max_bytes=VISION_BATCH_MAX_BYTES,
+)
+
+
+async def annotate_image(image_bytes: bytes) -> dict:
+    """Return the Google Vision SafeSearch annotation for an image."""
+    if VISION_BATCH_ENABLED:
+        return await vision_batcher.submit(image_bytes)
+    annotation = (await annotate_images([image_bytes]))[0]
+    if isinstance(annotation, Exception):
+        raise annotation
+    return annotation
+
+
+async def _perspective_scores(texts: list, concurrency: int) -> list:
+    """Call Perspective concurrently, with at most `concurrency` calls in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(text):
+        async with semaphore:
+            return await perspective_score(text)
+
+    return await asyncio.gather(*(bounded(text) for text in texts))
+
+
+class PerspectiveProvider(TextProvider):
+    name = "perspective"
+
+    async def score_texts(self, texts: list, concurrency: int) -> list:
+        return await _perspective_scores(texts, concurrency)
+
+
+class LocalTextProvider(TextProvider):
+    """The CPU n-gram model; scores a whole batch in one vectorized pass."""
+
+    name = "local"
+
+    async def score_texts(self, texts: list, concurrency: int) -> list:
+        return score_texts_locally(texts)
+
+
+class VisionProvider(ImageProvider):
+    name = "vision"
+
+    async def annotate(self, image_bytes: bytes) -> dict:
+        return await annotate_image(image_bytes)
+
+
+# Registered backends by name, for TEXT_PROVIDERS / IMAGE_PROVIDERS
+text_providers = {provider.name: provider for provider in (PerspectiveProvider(), LocalTextProvider(), FakeTextProvider())}
+image_providers = {provider.name: provider for provider in (VisionProvider(), FakeImageProvider())}
+
+text_router = build_router("text", TEXT_PROVIDER_POLICY, TEXT_PROVIDERS, text_providers)
+image_router = build_router("image", IMAGE_PROVIDER_POLICY, IMAGE_PROVIDERS, image_providers)
+
+
+async def score_text(text: str) -> float:
+    """Toxicity score from the configured providers."""
+    return (await score_texts([text], 1))[0]
+
+
+async def _routed_scores(texts: list, concurrency: int) -> list:
+    async def call(provider):
+        # Tier metrics are labelled with whichever provider ends up deciding the texts
+        start = time.perf_counter()
+        scores = await provider.score_texts(texts, concurrency)
+        TIER_LATENCY.labels(provider.name).observe(time.perf_counter() - start)
+        TIER_DECISIONS.labels(provider.name, "decided").inc(len(texts))
+        return scores
+
+    return await text_router.route(call)
+
+
+async def score_texts(texts: list, concurrency: int) -> list:
+    """
+    Score several texts through the text provider router. With tiered
+    moderation, the local pre-screen settles confident cases and only texts
+    in its uncertainty band are sent on to the providers.
+    """
+    if not TIERED_MODERATION_ENABLED:
+        return await _routed_scores(texts, concurrency)
+
+    scores = prescreen(texts)
+    escalated = [i for i, score in enumerate(scores) if score is None]
+    if escalated:
+        upstream_scores = await _routed_scores([texts[i] for i in escalated], concurrency)
+        for i, score in zip(escalated, upstream_scores):
+            scores[i] = score
+    return scores
+
+
+def match_known_text(text: str):
+    """Verdict for a known text from the in-memory index, or None; no network I/O."""
+    if not KNOWN_CONTENT_ENABLED:
+        return None
+    known_result = known_content.match_text(text_fingerprint(text))
+    return {"text": text, **known_result} if known_result else None
+
+
+async def get_cached_text_results(texts: list) -> list:
+    """Cached results for each text (or None), answered from the local tier or one Redis MGET."""
+    verdicts = await text_verdicts.get_many([text_cache_key(text) for text in texts])
+    return [{"text": text, **verdict} if verdict else None for text, verdict in zip(texts, verdicts)]
+
+
+async def get_cached_text_result(text: str):
+    return (await get_cached_text_results([text]))[0]
+
+
+async def cache_text_results(results: list) -> None:
+    await text_verdicts.set_many({text_cache_key(r["text"]): text_verdict(r) for r in results})
+
+
+async def moderate_text(text: str) -> dict:
+    """
+    Moderate a text that missed the cache, then store and cache the verdict.
+    Identical concurrent requests are coalesced into a single upstream call.
+    """
+    cache_key = text_cache_key(text)
+
+    async def compute():
+        moderation_result = build_text_result(text, await score_text(text))
+        await save_results([{
+            "text": text,
+            "flagged": moderation_result["flagged"],
+            "categories": moderation_result["categories"],
+            "content_type": "text",
+        }])
+        await cache_text_results([moderation_result])
+        return moderation_result
+
+    async def read_cached():
+        return await get_cached_text_result(text)
+
+    moderation_result = await coalesce(cache_key, compute, read_cached)
+    # Coalesced callers may have sent a whitespace or case variant of the leader's text
+    return {**moderation_result, "text": text}
+
+
+async def moderate_texts(texts: list) -> list:
+    """
+    Moderate many texts at once and return one result per text, in input order.
+    Texts that normalize to the same cache key are moderated once, known
+    content is answered from memory, cache hits are resolved in one lookup,
+    misses are scored concurrently and all new results are stored with a
+    single bulk insert.
+    """
+    keys = [text_cache_key(text) for text in texts]
+    unique = dict(zip(keys, texts))
+
+    results = {}
+    for key, text in unique.items():
+        known_result = match_known_text(text)
+        if known_result:
+            results[key] = known_result
+    unknown = {key: text for key, text in unique.items() if key not in results}
+    cached_results = await get_cached_text_results(list(unknown.values())) if unknown else []
+
+    misses = []
+    for key, text, cached_result in zip(unknown, unknown.values(), cached_results):
+        if cached_result:
+            results[key] = cached_result
+        else:
+            misses.append(text)
+
+    if misses:
+        scores = await score_texts(misses, BATCH_UPSTREAM_CONCURRENCY)
+        new_results = [build_text_result(text, score) for text, score in zip(misses, scores)]
+
+        # One multi-row INSERT for every newly moderated text
+        await save_results([
+            {"text": r["text"], "flagged": r["flagged"], "categories": r["categories"], "content_type": "text"}
+            for r in new_results
+        ])
+        await cache_text_results(new_results)
+        for moderation_result in new_results:
+            results[text_cache_key(moderation_result["text"])] = moderation_result
+
+    return [{**results[key], "text": text} for key, text in zip(keys, texts)]
+
+
+async def moderate_image(filename: str, prepared: PreparedImage) -> dict:
+    """Moderate a preprocessed image, reusing known or cached verdicts for identical or near-identical images."""
+    if KNOWN_CONTENT_ENABLED:
+        known_result = known_content.match_image(prepared.content_hash, prepared.dhash)
+        if known_result:
+            return {**known_result, "filename": filename}
+
+    # Cache by decoded content, with a perceptual hash for near-duplicate reposts
+    with STAGE_LATENCY.labels("cache_lookup").time():
+        cached_result = await lookup_image_verdict(prepared.content_hash, prepared.dhash)
+    if cached_result:
+        return {**cached_result, "filename": filename}
+
+    # Send the downscaled, re-encoded copy to the configured image providers
+    annotations = await image_router.route(lambda provider: provider.annotate(prepared.payload))
+    moderation_result = build_image_result(filename, annotations)
+
+    # Store result in database
+    await save_results([{
+        "text": filename,
+        "flagged": moderation_result["flagged"],
+        "categories": annotations,
+        "content_type": "image",
+    }])
+
+    # Cache the result for future requests
+    await store_image_verdict(prepared.content_hash, prepared.dhash, moderation_result)
+    return moderation_result
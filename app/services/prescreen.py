@@ -0,0 +1,61 @@
+import re
+import time
+
+from app.core.config import (
+    PRESCREEN_USE_LOCAL_MODEL,
+    PRESCREEN_CLEAN_BELOW,
+    PRESCREEN_FLAG_ABOVE,
+    PRESCREEN_LEXICON_SCORE,
+    PRESCREEN_LEXICON_PATH,
+)
+from app.core.metrics import TIER_DECISIONS, TIER_LATENCY
+from app.services.fingerprint import normalize_text
+from app.services.local_model import DEFAULT_LEXICON, score_texts_locally
+
+# Terms whose presence alone is treated as a confident "flagged" verdict
+SEVERE_TERM_WEIGHT = 4.0
+
+
+def _load_terms():
+    terms = {term for term, weight in DEFAULT_LEXICON.items() if weight >= SEVERE_TERM_WEIGHT}
+    if PRESCREEN_LEXICON_PATH:
+        with open(PRESCREEN_LEXICON_PATH, encoding="utf-8") as lexicon:
+            terms.update(line.strip() for line in lexicon if line.strip() and not line.startswith("#"))
+    return {normalize_text(term) for term in terms}
+
+
+def build_term_pattern(terms) -> re.Pattern:
+    """One compiled alternation over whole-word terms, longest first, so each text is scanned once."""
+    alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
+
+TERM_PATTERN = build_term_pattern(_load_terms())
+
+
+def prescreen(texts: list) -> list:
+    """
+    Settle high-confidence texts locally. Returns a toxicity score for each
+    settled text and None for texts in the uncertainty band, which must be
+    escalated upstream.
+    """
+    start = time.perf_counter()
+    local_scores = score_texts_locally(texts) if PRESCREEN_USE_LOCAL_MODEL else [None] * len(texts)
+
+    decisions = []
+    for text, local_score in zip(texts, local_scores):
+        if TERM_PATTERN.search(normalize_text(text)):
+            decisions.append(max(local_score or 0.0, PRESCREEN_LEXICON_SCORE))
+            TIER_DECISIONS.labels("prescreen", "flagged").inc()
+        elif local_score is not None and local_score >= PRESCREEN_FLAG_ABOVE:
+            decisions.append(local_score)
+            TIER_DECISIONS.labels("prescreen", "flagged").inc()
+        elif local_score is not None and local_score <= PRESCREEN_CLEAN_BELOW:
+            decisions.append(local_score)
+            TIER_DECISIONS.labels("prescreen", "clean").inc()
+        else:
+            decisions.append(None)
+            TIER_DECISIONS.labels("prescreen", "escalated").inc()
+
+    TIER_LATENCY.labels("prescreen").observe(time.perf_counter() - start)
+    return decisions
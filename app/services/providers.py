@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import logging
+import random
+import time
+
+from app.core.metrics import PROVIDER_CALLS, PROVIDER_LATENCY
+
+POLICIES = ("fallback", "race", "weighted")
+SAFESEARCH_CATEGORIES = ("adult", "spoof", "medical", "violence", "racy")
+
+
+class TextProvider(ABC):
+    """A text moderation backend; `score_texts` returns one toxicity score (0..1) per text."""
+
+    name = None
+
+    @abstractmethod
+    async def score_texts(self, texts: list, concurrency: int) -> list:
+        """Score `texts`, with at most `concurrency` upstream calls in flight."""
+
+
+class ImageProvider(ABC):
+    """An image moderation backend; `annotate` returns a SafeSearch-style {category: likelihood} dict."""
+
+    name = None
+
+    @abstractmethod
+    async def annotate(self, image_bytes: bytes) -> dict:
+        """Annotate one image."""
+
+
+class FakeTextProvider(TextProvider):
+    """Repeatable scores derived from a hash of the text, for tests and offline environments."""
+
+    name = "fake"
+
+    async def score_texts(self, texts: list, concurrency: int) -> list:
+        return [
+            int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big") / 2**64
+            for text in texts
+        ]
+
+
+class FakeImageProvider(ImageProvider):
+    """Annotates every image as clean."""
+
+    name = "fake"
+
+    async def annotate(self, image_bytes: bytes) -> dict:
+        return dict.fromkeys(SAFESEARCH_CATEGORIES, "VERY_UNLIKELY")
+
+
+def parse_provider_spec(spec: str) -> list:
+    """Parse "perspective:9,local:1" into [("perspective", 9.0), ("local", 1.0)]; weights default to 1."""
+    entries = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name:
+            entries.append((name.strip().lower(), float(weight) if weight else 1.0))
+    return entries
+
+
+class ProviderRouter:
+    """
+    Sends each call to one or more providers according to a policy:
+
+    - fallback: providers in the configured order until one succeeds
+    - race: all providers at once; the first success wins and the rest are cancelled
+    - weighted: one provider picked at random by weight, the others as fallbacks
+
+    If every provider fails, the last error is raised.
+    """
+
+    def __init__(self, kind: str, policy: str, providers: list, weights: list = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown {kind} provider policy '{policy}'; use one of {', '.join(POLICIES)}")
+        if not providers:
+            raise ValueError(f"No {kind} providers configured")
+        self.kind = kind
+        self.policy = policy
+        self.providers = providers
+        self.weights = weights or [1.0] * len(providers)
+        if policy == "weighted" and sum(self.weights) <= 0:
+            raise ValueError(f"{kind} provider weights must add up to more than zero")
+
+    @property
+    def provider_names(self) -> list:
+        return [provider.name for provider in self.providers]
+
+    async def route(self, call):
+        """Run `call(provider)` under the routing policy and return the winning result."""
+        if self.policy == "race" and len(self.providers) > 1:
+            return await self._race(call)
+        if self.policy == "weighted":
+            first = random.choices(self.providers, self.weights)[0]
+            return await self._in_order(call, [first] + [p for p in self.providers if p is not first])
+        return await self._in_order(call, self.providers)
+
+    async def _attempt(self, provider, call):
+        start = time.perf_counter()
+        try:
+            result = await call(provider)
+        except asyncio.CancelledError:
+            PROVIDER_CALLS.labels(self.kind, provider.name, "cancelled").inc()
+            raise
+        except Exception:
+            PROVIDER_CALLS.labels(self.kind, provider.name, "error").inc()
+            raise
+        PROVIDER_CALLS.labels(self.kind, provider.name, "success").inc()
+        PROVIDER_LATENCY.labels(self.kind, provider.name).observe(time.perf_counter() - start)
+        return result
+
+    async def _in_order(self, call, providers: list):
+        error = None
+        for provider in providers:
+            try:
+                return await self._attempt(provider, call)
+            except Exception as e:
+                error = e
+                if provider is not providers[-1]:
+                    logging.warning(f"{self.kind} provider '{provider.name}' failed ({e}); falling back")
+        raise error
+
+    async def _race(self, call):
+        pending = {asyncio.create_task(self._attempt(provider, call)) for provider in self.providers}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def build_router(kind: str, policy: str, spec: str, registry: dict) -> ProviderRouter:
+    """A router over the providers named in `spec`, looked up in `registry` (name -> provider)."""
+    entries = parse_provider_spec(spec)
+    unknown = [name for name, _ in entries if name not in registry]
+    if unknown:
+        raise ValueError(f"Unknown {kind} provider(s) {', '.join(unknown)}; available: {', '.join(registry)}")
+    return ProviderRouter(kind, policy, [registry[name] for name, _ in entries], [weight for _, weight in entries])
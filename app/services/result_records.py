@@ -0,0 +1,55 @@
+import logging
+
+from sqlalchemy import Integer, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import VerdictCache
+from app.core.config import RESULT_CACHE_TTL, LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_TTL
+from app.models.moderation import ModerationResult
+
+# Stored results by id (`moderation:{id}`); rows never change, so both tiers can hold them
+result_records = VerdictCache("result", RESULT_CACHE_TTL, LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_TTL)
+
+
+def result_cache_key(result_id: int) -> str:
+    return f"moderation:{result_id}"
+
+
+def result_record(result_id: int, text: str, flagged: bool, categories: dict) -> dict:
+    return {"id": result_id, "text": text, "flagged": flagged, "categories": categories}
+
+
+async def cache_new_results(ids: list, rows: list) -> None:
+    """Write freshly inserted results through to the id cache, so first reads skip Postgres."""
+    try:
+        await result_records.set_many({
+            result_cache_key(result_id): result_record(result_id, row["text"], row["flagged"], row["categories"])
+            for result_id, row in zip(ids, rows)
+        })
+    except Exception as e:
+        # The rows are committed; a cold cache only costs the first read a query
+        logging.warning(f"Failed to cache new moderation results: {str(e)}")
+
+
+async def lookup_results(db: AsyncSession, ids: list) -> list:
+    """
+    Stored results for `ids`, in request order (None where an id does not exist).
+    Cache hits come from one MGET, misses from one `id = ANY(...)` query, and
+    the misses are written back to the cache in one pipeline.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    cached = await result_records.get_many([result_cache_key(result_id) for result_id in unique_ids])
+    records = {result_id: record for result_id, record in zip(unique_ids, cached) if record is not None}
+
+    missing = [result_id for result_id in unique_ids if result_id not in records]
+    if missing:
+        rows = await db.scalars(
+            select(ModerationResult).where(ModerationResult.id == any_(literal(missing, ARRAY(Integer))))
+        )
+        loaded = {row.id: result_record(row.id, row.text, row.flagged, row.categories) for row in rows}
+        if loaded:
+            await result_records.set_many({result_cache_key(result_id): record for result_id, record in loaded.items()})
+        records.update(loaded)
+
+    return [records.get(result_id) for result_id in ids]
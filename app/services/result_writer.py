@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+from sqlalchemy import insert
+
+from app.core.config import (
+    WRITE_BEHIND_ENABLED,
+    WRITE_BEHIND_MAX_ROWS,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    WRITE_BEHIND_ENQUEUE_TIMEOUT,
+    WRITE_BEHIND_FLUSH_RETRIES,
+    WRITE_BEHIND_RETRY_BACKOFF_MS,
+)
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import STAGE_LATENCY, WRITE_BEHIND_QUEUE_SIZE, WRITE_BEHIND_FLUSH_ROWS, WRITE_BEHIND_EVENTS
+from app.models.moderation import ModerationResult
+from app.services.result_records import cache_new_results
+from app.services.stats import increment_stats
+
+_STOP = object()
+
+
+async def insert_results(rows: list) -> None:
+    """
+    Insert moderation results in a single multi-row INSERT and update the stats
+    counters in the same transaction, then write the new rows through to the id cache.
+    """
+    with STAGE_LATENCY.labels("db_write").time():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(insert(ModerationResult).returning(ModerationResult.id, sort_by_parameter_order=True), rows)
+            ids = result.scalars().all()
+            await increment_stats(db, rows)
+            await db.commit()
+    await cache_new_results(ids, rows)
+
+
+class ResultWriter:
+    """
+    Write-behind buffer for moderation results.
+
+    Requests enqueue rows and return immediately; a background task bulk-inserts
+    them every `batch_size` rows or `flush_interval` seconds. When the buffer is
+    full, callers wait up to `enqueue_timeout` and then write inline, so load is
+    pushed back onto requests instead of growing memory. A failed insert is
+    retried `retries` times with doubling backoff before its rows are dropped;
+    meanwhile the buffer fills and new rows fall back to inline writes.
+    """
+
+    def __init__(self, max_rows: int, batch_size: int, flush_interval: float, enqueue_timeout: float,
+                 retries: int = 0, retry_backoff: float = 0.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.queue = asyncio.Queue(maxsize=max_rows)
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush every buffered row, then stop the background task."""
+        if self.running:
+            await self.queue.put(_STOP)
+            await self._task
+        self._task = None
+
+    async def put(self, rows: list) -> None:
+        for i, row in enumerate(rows):
+            try:
+                await asyncio.wait_for(self.queue.put(row), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                WRITE_BEHIND_EVENTS.labels("backpressure").inc()
+                await insert_results(rows[i:])
+                return
+            finally:
+                WRITE_BEHIND_QUEUE_SIZE.set(self.queue.qsize())
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            stopping = batch[-1] is _STOP
+            rows = batch[:-1] if stopping else batch
+            WRITE_BEHIND_QUEUE_SIZE.set(self.queue.qsize())
+            if rows:
+                await self._flush(rows)
+            if stopping:
+                return
+
+    async def _flush(self, rows):
+        for attempt in range(self.retries + 1):
+            try:
+                await insert_results(rows)
+                WRITE_BEHIND_FLUSH_ROWS.observe(len(rows))
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    WRITE_BEHIND_EVENTS.labels("failed_rows").inc(len(rows))
+                    logging.exception(f"Write-behind flush of {len(rows)} moderation results failed; dropping them")
+                    return
+                delay = self.retry_backoff * 2 ** attempt
+                WRITE_BEHIND_EVENTS.labels("retries").inc()
+                logging.warning(f"Write-behind flush of {len(rows)} moderation results failed ({e}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+
+result_writer = ResultWriter(
+    WRITE_BEHIND_MAX_ROWS,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000,
+    WRITE_BEHIND_ENQUEUE_TIMEOUT,
+    WRITE_BEHIND_FLUSH_RETRIES,
+    WRITE_BEHIND_RETRY_BACKOFF_MS / 1000,
+)
+
+
+async def save_results(rows: list) -> None:
+    """Persist moderation results, through the write-behind buffer when it is enabled."""
+    if WRITE_BEHIND_ENABLED and result_writer.running:
+        await result_writer.put(rows)
+    else:
+        await insert_results(rows)
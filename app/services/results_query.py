@@ -0,0 +1,100 @@
+import base64
+from datetime import datetime, timezone
+
+import orjson
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.moderation import ModerationResult, toxicity_score
+
+def _as_stored(value: datetime) -> datetime:
+    """created_at is a naive UTC timestamp; convert aware datetimes to match."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def build_filters(
+    flagged: bool = None,
+    content_type: str = None,
+    created_after: datetime = None,
+    created_before: datetime = None,
+    min_toxicity: float = None,
+    max_toxicity: float = None,
+    safesearch: dict = None,
+) -> list:
+    """WHERE clauses for a result search; each one is served by an index from the search migration."""
+    filters = []
+    if flagged is not None:
+        filters.append(ModerationResult.flagged == flagged)
+    if content_type is not None:
+        filters.append(ModerationResult.content_type == content_type)
+    if created_after is not None:
+        filters.append(ModerationResult.created_at >= _as_stored(created_after))
+    if created_before is not None:
+        filters.append(ModerationResult.created_at < _as_stored(created_before))
+    if min_toxicity is not None:
+        filters.append(toxicity_score > min_toxicity)
+    if max_toxicity is not None:
+        filters.append(toxicity_score <= max_toxicity)
+    likelihoods = {category: value for category, value in (safesearch or {}).items() if value is not None}
+    if likelihoods:
+        # One containment test answers every SafeSearch equality from the GIN index
+        filters.append(ModerationResult.categories.contains(likelihoods))
+    return filters
+
+
+def encode_cursor(created_at: datetime, result_id: int) -> str:
+    """Opaque page cursor; legacy rows without a created_at encode it as null."""
+    payload = orjson.dumps([created_at.isoformat() if created_at else None, result_id])
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        created_at, result_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at) if created_at is not None else None, int(result_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def after_cursor(cursor: str):
+    """Keyset condition for rows that sort after the cursor in (created_at, id) descending order."""
+    created_at, result_id = decode_cursor(cursor)
+    if created_at is None:
+        # DESC sorts NULLs first (as the index does), so every dated row is still ahead
+        return or_(
+            ModerationResult.created_at.is_not(None),
+            ModerationResult.id < result_id,
+        )
+    # A NULL created_at compares as unknown here, and those rows came before any dated one anyway
+    return tuple_(ModerationResult.created_at, ModerationResult.id) < tuple_(created_at, result_id)
+
+
+def newest_first(query):
+    return query.order_by(ModerationResult.created_at.desc(), ModerationResult.id.desc())
+
+
+def serialize_result(result: ModerationResult) -> dict:
+    return {
+        "id": result.id,
+        "text": result.text,
+        "content_type": result.content_type,
+        "flagged": result.flagged,
+        "categories": result.categories,
+        "created_at": result.created_at.isoformat() if result.created_at else None,
+    }
+
+
+async def search_results(db: AsyncSession, filters: list, limit: int, cursor: str = None) -> dict:
+    """One page of matching results, newest first, plus the cursor for the next page (None at the end)."""
+    query = select(ModerationResult).where(*filters)
+    if cursor:
+        query = query.where(after_cursor(cursor))
+    # Fetch one extra row to learn whether another page exists
+    rows = (await db.scalars(newest_first(query).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {"items": [serialize_result(row) for row in rows], "next_cursor": next_cursor}
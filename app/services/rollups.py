@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal_column, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    ROLLUP_INTERVAL_SECONDS,
+    ROLLUP_BATCH_SIZE,
+    ROLLUP_SETTLE_SECONDS,
+    ROLLUP_GAP_TIMEOUT_SECONDS,
+    ROLLUP_MAX_GAPS,
+)
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import ROLLUP_ROWS
+from app.models.moderation import ModerationResult, ModerationRollupHour, ModerationRollupMinute, RollupWatermark
+
+TOXICITY_BINS = 100  # 0.01-wide score bins
+SAFESEARCH_CATEGORIES = ("adult", "spoof", "medical", "violence", "racy")
+LIKELIHOODS = ("UNKNOWN", "VERY_UNLIKELY", "UNLIKELY", "POSSIBLE", "LIKELY", "VERY_LIKELY")
+PERCENTILES = (50, 90, 95, 99)
+
+BUCKETS = {"minute": ModerationRollupMinute, "hour": ModerationRollupHour}
+_WINDOW_PATTERN = re.compile(r"^(\d+)([mhd])$")
+_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def parse_window(window: str) -> int:
+    """Turn a window like "15m", "24h" or "7d" into seconds."""
+    match = _WINDOW_PATTERN.match(window.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid window '{window}'; use a number followed by m, h or d (e.g. 24h)")
+    return int(match.group(1)) * _WINDOW_UNITS[match.group(2)]
+
+
+def _empty_bucket() -> dict:
+    return {
+        "total": 0,
+        "flagged": 0,
+        "toxicity_histogram": [0] * TOXICITY_BINS,
+        "safesearch_counts": [0] * (len(SAFESEARCH_CATEGORIES) * len(LIKELIHOODS)),
+    }
+
+
+def _add_result(bucket: dict, flagged: bool, categories: dict) -> None:
+    bucket["total"] += 1
+    bucket["flagged"] += bool(flagged)
+    score = categories.get("toxicity_score")
+    if isinstance(score, (int, float)):
+        bucket["toxicity_histogram"][min(TOXICITY_BINS - 1, max(0, int(score * TOXICITY_BINS)))] += 1
+    for i, category in enumerate(SAFESEARCH_CATEGORIES):
+        likelihood = categories.get(category)
+        if likelihood in LIKELIHOODS:
+            bucket["safesearch_counts"][i * len(LIKELIHOODS) + LIKELIHOODS.index(likelihood)] += 1
+
+
+def _merge_into(target: dict, bucket: dict) -> None:
+    target["total"] += bucket["total"]
+    target["flagged"] += bucket["flagged"]
+    for column in ("toxicity_histogram", "safesearch_counts"):
+        target[column] = [a + b for a, b in zip(target[column], bucket[column])]
+
+
+def fold_results(rows) -> tuple:
+    """
+    Aggregate (content_type, flagged, categories, created_at) rows into minute
+    and hour buckets keyed by (bucket_start, content_type).
+    """
+    minutes = {}
+    for content_type, flagged, categories, created_at in rows:
+        key = (created_at.replace(second=0, microsecond=0), content_type)
+        _add_result(minutes.setdefault(key, _empty_bucket()), flagged, categories or {})
+
+    hours = {}
+    for (minute, content_type), bucket in minutes.items():
+        _merge_into(hours.setdefault((minute.replace(minute=0), content_type), _empty_bucket()), bucket)
+    return minutes, hours
+
+
+def _upsert(model, buckets: dict):
+    """Add bucket deltas to the rollup rows, summing the histogram arrays element-wise."""
+    table = model.__tablename__
+    stmt = pg_insert(model).values([
+        {"bucket_start": bucket_start, "content_type": content_type, **bucket}
+        for (bucket_start, content_type), bucket in sorted(buckets.items())
+    ])
+
+    def add_arrays(column):
+        return literal_column(
+            f"ARRAY(SELECT a + b FROM unnest({table}.{column}, excluded.{column}) "
+            f"WITH ORDINALITY AS t(a, b, n) ORDER BY n)"
+        )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[model.bucket_start, model.content_type],
+        set_={
+            "total": model.total + stmt.excluded.total,
+            "flagged": model.flagged + stmt.excluded.flagged,
+            "toxicity_histogram": add_arrays("toxicity_histogram"),
+            "safesearch_counts": add_arrays("safesearch_counts"),
+        },
+    )
+
+
+def track_gaps(gaps: dict, last_id: int, ids: list, now: datetime, timeout: int, max_gaps: int) -> dict:
+    """
+    Update the ids skipped behind the watermark. `ids` are the new ids being
+    folded (ascending, above `last_id`); every id missing between them has not
+    committed yet, or never will. Gaps older than `timeout` seconds are
+    treated as rolled back and forgotten, and at most `max_gaps` are kept.
+    """
+    gaps = {
+        gap_id: seen for gap_id, seen in gaps.items()
+        if datetime.fromisoformat(seen) >= now - timedelta(seconds=timeout)
+    }
+    seen = now.isoformat()
+    previous = last_id
+    for result_id in ids:
+        for gap_id in range(previous + 1, min(result_id, previous + 1 + max_gaps)):
+            gaps[str(gap_id)] = seen
+        previous = result_id
+    if len(gaps) > max_gaps:
+        logging.warning(f"Tracking only the newest {max_gaps} of {len(gaps)} rollup id gaps")
+        gaps = dict(sorted(gaps.items(), key=lambda gap: int(gap[0]))[-max_gaps:])
+    return gaps
+
+
+_ROLLUP_COLUMNS = (
+    ModerationResult.id,
+    ModerationResult.content_type,
+    ModerationResult.flagged,
+    ModerationResult.categories,
+    ModerationResult.created_at,
+)
+
+
+async def aggregate_once(batch_size: int, settle_seconds: int,
+                         gap_timeout: int = ROLLUP_GAP_TIMEOUT_SECONDS, max_gaps: int = ROLLUP_MAX_GAPS) -> int:
+    """
+    Fold the next batch of results after the watermark into the rollups and
+    advance the watermark, all in one transaction. Returns the rows processed.
+
+    Ids are assigned at insert but become visible at commit, so a row can
+    commit after the watermark has passed its id. Ids skipped this way are
+    kept in the watermark row and folded in once they appear.
+    """
+    async with AsyncSessionLocal() as db:
+        # SKIP LOCKED: when another worker holds the watermark it is already aggregating
+        watermark = (await db.execute(
+            select(RollupWatermark.last_id, RollupWatermark.gaps)
+            .where(RollupWatermark.id == 1)
+            .with_for_update(skip_locked=True)
+        )).first()
+        if watermark is None:
+            return 0
+        last_id, gaps = watermark.last_id, dict(watermark.gaps or {})
+
+        now = await db.scalar(select(func.localtimestamp()))
+        cutoff = now - timedelta(seconds=settle_seconds)
+
+        # Late commits behind the watermark are visible, hence committed; fold them as they are
+        late = []
+        if gaps:
+            late = (await db.execute(
+                select(*_ROLLUP_COLUMNS).where(ModerationResult.id.in_([int(gap_id) for gap_id in gaps]))
+            )).all()
+            for row in late:
+                gaps.pop(str(row.id), None)
+
+        result = await db.execute(
+            select(*_ROLLUP_COLUMNS)
+            .where(ModerationResult.id > last_id)
+            .order_by(ModerationResult.id)
+            .limit(batch_size)
+        )
+        rows = []
+        for row in result.all():
+            # Stop at the first recent row, so most in-flight inserts commit before the watermark passes them
+            if row.created_at is not None and row.created_at >= cutoff:
+                break
+            rows.append(row)
+        new_gaps = track_gaps(gaps, last_id, [row.id for row in rows], now, gap_timeout, max_gaps)
+        if not rows and not late and new_gaps == (watermark.gaps or {}):
+            return 0
+
+        folded = late + rows
+        if folded:
+            minutes, hours = fold_results(
+                (row.content_type, row.flagged, row.categories, row.created_at or cutoff) for row in folded
+            )
+            await db.execute(_upsert(ModerationRollupMinute, minutes))
+            await db.execute(_upsert(ModerationRollupHour, hours))
+        await db.execute(
+            update(RollupWatermark)
+            .where(RollupWatermark.id == 1)
+            .values(last_id=rows[-1].id if rows else last_id, gaps=new_gaps)
+        )
+        await db.commit()
+
+    ROLLUP_ROWS.inc(len(folded))
+    return len(folded)
+
+
+class RollupAggregator:
+    """Background task that keeps the minute/hour rollups caught up with new results."""
+
+    def __init__(self, interval: float, batch_size: int, settle_seconds: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await aggregate_once(self.batch_size, self.settle_seconds)
+            except Exception:
+                logging.exception("Rollup aggregation failed")
+                processed = 0
+            # Keep going without pausing while catching up on a backlog
+            if processed < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+
+rollup_aggregator = RollupAggregator(ROLLUP_INTERVAL_SECONDS, ROLLUP_BATCH_SIZE, ROLLUP_SETTLE_SECONDS)
+
+
+def percentiles_from_histogram(histogram: list) -> dict:
+    """Approximate score percentiles (upper bin edge) from a toxicity histogram."""
+    total = sum(histogram)
+    if not total:
+        return {f"p{pct}": None for pct in PERCENTILES}
+    result = {}
+    for pct in PERCENTILES:
+        threshold, cumulative = total * pct / 100, 0
+        for i, count in enumerate(histogram):
+            cumulative += count
+            if cumulative >= threshold:
+                result[f"p{pct}"] = (i + 1) / TOXICITY_BINS
+                break
+    return result
+
+
+def _summed_array(model, column, filters):
+    elements = func.unnest(column).table_valued("v", with_ordinality="n").lateral()
+    return (
+        select(elements.c.n, func.sum(elements.c.v))
+        .select_from(model)
+        .join(elements, true())
+        .where(*filters)
+        .group_by(elements.c.n)
+    )
+
+
+async def read_window_stats(db: AsyncSession, window_seconds: int, bucket: str, content_type: str = None) -> dict:
+    """Flag rates and score distributions for the last `window_seconds`, from the rollup tables."""
+    model = BUCKETS[bucket]
+    filters = [model.bucket_start >= func.localtimestamp() - timedelta(seconds=window_seconds)]
+    if content_type:
+        filters.append(model.content_type == content_type)
+
+    series = (await db.execute(
+        select(model.bucket_start, func.sum(model.total), func.sum(model.flagged))
+        .where(*filters)
+        .group_by(model.bucket_start)
+        .order_by(model.bucket_start)
+    )).all()
+
+    # Histograms are summed element-wise in Postgres so only the totals come back
+    histogram = [0] * TOXICITY_BINS
+    for n, count in (await db.execute(_summed_array(model, model.toxicity_histogram, filters))).all():
+        histogram[n - 1] = int(count)
+    safesearch = {category: dict.fromkeys(LIKELIHOODS, 0) for category in SAFESEARCH_CATEGORIES}
+    for n, count in (await db.execute(_summed_array(model, model.safesearch_counts, filters))).all():
+        category, likelihood = divmod(n - 1, len(LIKELIHOODS))
+        safesearch[SAFESEARCH_CATEGORIES[category]][LIKELIHOODS[likelihood]] = int(count)
+
+    total = sum(int(row[1]) for row in series)
+    flagged = sum(int(row[2]) for row in series)
+    return {
+        "window_seconds": window_seconds,
+        "bucket": bucket,
+        "content_type": content_type,
+        "total_moderated": total,
+        "flagged_count": flagged,
+        "flag_rate": flagged / total if total else None,
+        "toxicity": {"count": sum(histogram), "percentiles": percentiles_from_histogram(histogram)},
+        "safesearch": safesearch,
+        "series": [
+            {
+                "bucket_start": bucket_start.isoformat(),
+                "total": int(bucket_total),
+                "flagged": int(bucket_flagged),
+                "flag_rate": int(bucket_flagged) / int(bucket_total) if bucket_total else None,
+            }
+            for bucket_start, bucket_total, bucket_flagged in series
+        ],
+    }
@@ -0,0 +1,52 @@
+from collections import Counter
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.moderation import ModerationStats
+
+CONTENT_TYPES = ("text", "image")
+
+
+async def increment_stats(db: AsyncSession, rows: list) -> None:
+    """Add newly inserted results to the summary counters; call inside the insert's transaction."""
+    counts = Counter((row.get("content_type", "text"), bool(row["flagged"])) for row in rows)
+    if not counts:
+        return
+    # Sorted keys give every writer the same lock order on the counter rows
+    stmt = pg_insert(ModerationStats).values([
+        {"content_type": content_type, "flagged": flagged, "count": count}
+        for (content_type, flagged), count in sorted(counts.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ModerationStats.content_type, ModerationStats.flagged],
+        set_={"count": ModerationStats.count + stmt.excluded.count},
+    )
+    await db.execute(stmt)
+
+
+def summarize(counts: list) -> dict:
+    """Build the /stats payload from (content_type, flagged, count) rows."""
+    by_content_type = {content_type: {"flagged": 0, "non_flagged": 0} for content_type in CONTENT_TYPES}
+    for content_type, flagged, count in counts:
+        bucket = by_content_type.setdefault(content_type, {"flagged": 0, "non_flagged": 0})
+        bucket["flagged" if flagged else "non_flagged"] += count
+
+    flagged_count = sum(bucket["flagged"] for bucket in by_content_type.values())
+    non_flagged_count = sum(bucket["non_flagged"] for bucket in by_content_type.values())
+    return {
+        "total_moderated": flagged_count + non_flagged_count,
+        "flagged_count": flagged_count,
+        "non_flagged_count": non_flagged_count,
+        "by_content_type": {
+            content_type: {**bucket, "total": bucket["flagged"] + bucket["non_flagged"]}
+            for content_type, bucket in by_content_type.items()
+        },
+    }
+
+
+async def read_stats(db: AsyncSession) -> dict:
+    """Current totals, read from the handful of summary rows rather than the results table."""
+    result = await db.execute(select(ModerationStats.content_type, ModerationStats.flagged, ModerationStats.count))
+    return summarize(result.all())
@@ -0,0 +1,64 @@
+import asyncio
+from app.core.batching import MicroBatcher
+
+def test_concurrent_submissions_are_grouped_up_to_max_size():
+    """Items submitted together should be handled in batches of at most max_size, in order."""
+    batches = []
+
+    async def handler(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_size=4, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(10)]
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+def test_byte_budget_splits_batches():
+    """A batch should be dispatched before it would exceed max_bytes."""
+    batches = []
+
+    async def handler(items):
+        batches.append(list(items))
+        return items
+
+    async def run():
+        batcher = MicroBatcher(handler, max_size=100, max_wait=0.01, max_bytes=10)
+        return await asyncio.gather(*(batcher.submit(b"xxxx") for _ in range(5)))
+
+    asyncio.run(run())
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+def test_per_item_errors_only_fail_their_caller():
+    """An exception returned for one item must not affect the rest of the batch."""
+    async def handler(items):
+        return [ValueError("bad") if item == 1 else item for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_size=10, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+
+def test_worker_text_batching_only_under_a_threaded_pool():
+    """Prefork and solo processes run one task at a time, so their texts must skip the batch window."""
+    from celery.concurrency import get_implementation
+    from celery.signals import worker_init
+    from app.workers import tasks
+
+    class Worker:
+        def __init__(self, pool, concurrency=64):
+            self.pool_cls, self.concurrency = pool, concurrency
+
+    try:
+        for pool, batched in (("prefork", False), ("solo", False), ("threads", True), (get_implementation("threads"), True)):
+            worker_init.send(sender=Worker(pool))
+            assert tasks._batch_texts is batched
+        worker_init.send(sender=Worker("threads", concurrency=1))
+        assert tasks._batch_texts is False
+    finally:
+        tasks._batch_texts = False
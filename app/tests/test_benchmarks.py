@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_upstream import PERSPECTIVE_PATH, UpstreamProfile, create_app
+from benchmarks.run import compare, percentile, summarize
+from benchmarks.workloads import Workload
+
+def perspective(client, text):
+    return client.post(PERSPECTIVE_PATH, json={"comment": {"text": text}})
+
+def test_fake_perspective_scores_are_deterministic_and_match_the_flag_rate():
+    client = TestClient(create_app(UpstreamProfile(latency_ms=0, latency_sigma=0, flag_rate=0.2)))
+    scores = [perspective(client, f"comment {i}").json()["attributeScores"]["TOXICITY"]["summaryScore"]["value"] for i in range(500)]
+    assert scores[:20] == [perspective(client, f"comment {i}").json()["attributeScores"]["TOXICITY"]["summaryScore"]["value"] for i in range(20)]
+    assert 0.15 < sum(score > 0.5 for score in scores) / len(scores) < 0.25
+    assert client.get("/calls").json()["perspective"] == 520
+
+def test_fake_upstream_injects_failures():
+    client = TestClient(create_app(UpstreamProfile(latency_ms=0, latency_sigma=0, throttle_rate=1.0)))
+    assert perspective(client, "hello").status_code == 429
+    client = TestClient(create_app(UpstreamProfile(latency_ms=0, latency_sigma=0, error_rate=1.0)))
+    assert perspective(client, "hello").status_code == 503
+    assert client.get("/calls").json()["failed"] == 1
+
+def test_workload_mix_and_hit_ratio():
+    workload = Workload("mixed", image_share=0.25, hit_ratio=0.5, hot_set=10)
+    workload.prepare("run", seed=1)
+    assert len(workload.warmup_requests()) == 20
+    hot = set(workload.hot_texts)
+    requests = [workload.next_request() for _ in range(2000)]
+    texts = [kwargs["json"]["text"] for kind, _, kwargs in requests if kind == "text"]
+    assert 0.2 < 1 - len(texts) / len(requests) < 0.3
+    assert 0.45 < sum(text in hot for text in texts) / len(texts) < 0.55
+
+def test_summarize_reports_nearest_rank_percentiles():
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([], 99) is None
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=5, elapsed=2.0)
+    assert summary["requests"] == 105
+    assert summary["throughput_rps"] == 50.0
+    assert summary["latency_ms"]["p95"] == 95.0
+    assert summary["latency_ms"]["p99"] == 99.0
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    def run(rps, p95, errors=0.0):
+        return {"scenarios": [{"name": "text", "throughput_rps": rps, "error_rate": errors, "latency_ms": {"p95": p95, "p99": p95}}]}
+    baseline = run(100, 50)
+    assert compare(run(90, 55), baseline, tolerance=0.2) == []
+    regressions = compare(run(70, 70, errors=0.05), baseline, tolerance=0.2)
+    assert len(regressions) == 4
+    assert regressions[0].startswith("text: throughput")
@@ -0,0 +1,22 @@
+import time
+from app.core.cache import LocalCache
+
+def test_local_cache_evicts_least_recently_used():
+    """Reading a key should protect it from eviction."""
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+def test_local_cache_expires_entries():
+    """Entries older than the TTL should be treated as misses."""
+    cache = LocalCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,39 @@
+import asyncio
+import csv
+import gzip
+import io
+
+import orjson
+
+from app.services.export import encode_export
+
+ROWS = [
+    {"id": 1, "text": "hello", "content_type": "text", "flagged": False,
+     "categories": {"toxicity_score": 0.1}, "created_at": "2025-03-01T10:00:00"},
+    {"id": 2, "text": "a, \"quoted\"\nline", "content_type": "text", "flagged": True,
+     "categories": {"toxicity_score": 0.9}, "created_at": "2025-03-01T10:00:01"},
+]
+
+def collect(export_format, compress, batches):
+    async def source():
+        for batch in batches:
+            yield batch
+
+    async def run():
+        return b"".join([chunk async for chunk in encode_export(source(), export_format, compress)])
+
+    return asyncio.run(run())
+
+def test_ndjson_is_written_batch_by_batch():
+    body = collect("ndjson", False, [ROWS[:1], ROWS[1:]])
+    assert [orjson.loads(line) for line in body.splitlines()] == ROWS
+
+def test_gzip_csv_round_trips_with_a_single_header():
+    body = collect("csv", True, [ROWS[:1], ROWS[1:]])
+    records = list(csv.DictReader(io.StringIO(gzip.decompress(body).decode("utf-8"))))
+    assert [record["id"] for record in records] == ["1", "2"]
+    assert records[1]["text"] == ROWS[1]["text"]
+    assert orjson.loads(records[1]["categories"]) == {"toxicity_score": 0.9}
+
+def test_empty_csv_export_still_has_a_header():
+    assert collect("csv", False, []).startswith(b"id,text,")
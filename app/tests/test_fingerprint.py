@@ -0,0 +1,34 @@
+import io
+from PIL import Image
+from app.services.fingerprint import image_content_hash, image_dhash, hamming_distance, text_fingerprint
+
+def _reencode(image, size, quality):
+    buffer = io.BytesIO()
+    image.resize(size).save(buffer, "JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+def test_content_hash_ignores_container_bytes():
+    """The same pixels saved losslessly under different containers share a content hash."""
+    image = Image.open("test_images/testcase1.jpg").convert("RGB")
+    png, bmp = io.BytesIO(), io.BytesIO()
+    image.save(png, "PNG")
+    image.save(bmp, "BMP")
+    assert image_content_hash(Image.open(png)) == image_content_hash(Image.open(bmp))
+
+def test_dhash_matches_resized_reencoded_copy():
+    """A downscaled, recompressed repost stays within a few bits of the original."""
+    image = Image.open("test_images/valid_image.jpg").convert("RGB")
+    copy = _reencode(image, (image.width // 3, image.height // 3), quality=50)
+    assert hamming_distance(image_dhash(image), image_dhash(copy)) <= 4
+
+def test_dhash_separates_different_images():
+    """Unrelated images should be far apart."""
+    first = Image.open("test_images/valid_image.jpg")
+    second = Image.open("test_images/violence.jpg")
+    assert hamming_distance(image_dhash(first), image_dhash(second)) > 10
+
+def test_text_fingerprint_ignores_case_and_whitespace():
+    """Trivial variants of a comment should share one cache key."""
+    assert text_fingerprint("You are  GREAT\n") == text_fingerprint("you are great")
+    assert text_fingerprint("you are great") != text_fingerprint("you are grate")
+    assert len(text_fingerprint("x" * 10000)) == 32
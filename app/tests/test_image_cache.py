@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.services import image_cache as image_cache_module
+from app.services.image_cache import lookup_image_verdict, store_image_verdict
+
+class ZsetRedis:
+    """Just enough of redis.asyncio for the image cache: strings, sorted sets and pipelines."""
+
+    def __init__(self):
+        self.data = {}
+        self.zsets = {}
+        self.mget_calls = 0
+        self.pending = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.zsets.get(key, {})
+        for member, score in list(members.items()):
+            if score <= high:
+                del members[member]
+
+    def zrangebyscore(self, key, low, high):
+        self.pending.append([member for member, score in self.zsets.get(key, {}).items() if score >= low])
+
+    def expire(self, key, ttl):
+        pass
+
+    async def execute(self):
+        results, self.pending = self.pending, []
+        return results
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis_client = ZsetRedis()
+
+    async def get_redis():
+        return redis_client
+
+    monkeypatch.setattr(image_cache_module, "get_redis", get_redis)
+    return redis_client
+
+def test_near_duplicate_is_resolved_with_one_mget(fake_redis):
+    """A perceptually close image should get the stored verdict from a single MGET."""
+    dhash = 0x0123456789ABCDEF
+    asyncio.run(store_image_verdict("original", dhash, {"flagged": True}))
+    result = asyncio.run(lookup_image_verdict("recompressed", dhash ^ 0b101))
+    assert result == {"flagged": True}
+    assert fake_redis.mget_calls == 1
+
+def test_band_members_older_than_the_ttl_are_trimmed(fake_redis, monkeypatch):
+    """Storing into a band should drop members whose verdicts have expired."""
+    clock = [1_000_000.0]
+    monkeypatch.setattr(image_cache_module.time, "time", lambda: clock[0])
+    asyncio.run(store_image_verdict("old", 0x0123456789ABCDEF, {"flagged": False}))
+    clock[0] += image_cache_module.RESULT_CACHE_TTL + 1
+    asyncio.run(store_image_verdict("new", 0x0123456789ABCDEE, {"flagged": False}))
+    shared = [members for members in fake_redis.zsets.values() if "0123456789abcdee" in members]
+    assert shared and all("0123456789abcdef" not in members for members in shared)
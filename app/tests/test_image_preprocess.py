@@ -0,0 +1,27 @@
+import io
+import pytest
+from PIL import Image, UnidentifiedImageError
+from app.services.image_preprocess import prepare_image
+
+def test_large_images_are_downscaled_and_reencoded():
+    """The Vision payload should fit within the max dimension and be smaller than the upload."""
+    with open("test_images/valid_image.jpg", "rb") as image:
+        image_bytes = image.read()
+    prepared = prepare_image(image_bytes, max_dimension=512, upload_format="JPEG", quality=80)
+    payload = Image.open(io.BytesIO(prepared.payload))
+    assert max(payload.size) == 512
+    assert len(prepared.payload) < len(image_bytes)
+
+def test_hashes_are_taken_from_the_original_pixels():
+    """Fingerprints must not depend on the preprocessing settings."""
+    with open("test_images/valid_image.jpg", "rb") as image:
+        image_bytes = image.read()
+    small = prepare_image(image_bytes, max_dimension=256, upload_format="JPEG", quality=50)
+    large = prepare_image(image_bytes, max_dimension=4096, upload_format="WEBP", quality=90)
+    assert small.content_hash == large.content_hash
+    assert small.dhash == large.dhash
+
+def test_invalid_bytes_raise_pil_errors():
+    """Non-image uploads should surface as UnidentifiedImageError for the route to map to 400."""
+    with pytest.raises(UnidentifiedImageError):
+        prepare_image(b"not an image")
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.services import ingest as ingest_module
+from app.services.ingest import IngestError, ingest_lines, iter_lines
+
+def fake_moderation(monkeypatch, fail_on=None):
+    batches = []
+
+    async def moderate_texts(texts):
+        batches.append(list(texts))
+        if fail_on and fail_on in texts:
+            raise RuntimeError("upstream down")
+        return [{"text": text, "flagged": "bad" in text, "categories": {}} for text in texts]
+
+    monkeypatch.setattr(ingest_module, "moderate_texts", moderate_texts)
+    return batches
+
+async def as_stream(items):
+    for item in items:
+        yield item
+
+def lines_for(texts):
+    return [b'{"body": "%s"}' % text.encode() for text in texts]
+
+def test_lines_are_batched_and_invalid_lines_counted(monkeypatch):
+    batches = fake_moderation(monkeypatch)
+    lines = lines_for(["a", "bad b", "c"]) + [b"", b"not json", b'{"other": 1}'] + lines_for(["d", "e"])
+
+    progress = asyncio.run(ingest_lines(as_stream(lines), "body", batch_size=2, concurrency=2))
+    assert batches == [["a", "bad b"], ["c", "d"], ["e"]]
+    assert progress == {"lines": 8, "moderated": 5, "flagged": 1, "invalid": 3, "checkpoint": 8}
+
+def test_resume_skips_checkpointed_lines(monkeypatch):
+    batches = fake_moderation(monkeypatch)
+    progress = asyncio.run(ingest_lines(as_stream(lines_for(["a", "b", "c"])), "body", 10, 1, skip_lines=2))
+    assert batches == [["c"]]
+    assert progress["checkpoint"] == 3
+
+def test_failure_reports_the_last_complete_checkpoint(monkeypatch):
+    fake_moderation(monkeypatch, fail_on="c")
+    with pytest.raises(IngestError) as failure:
+        asyncio.run(ingest_lines(as_stream(lines_for(["a", "b", "c", "d"])), "body", 2, 1))
+    assert failure.value.progress["checkpoint"] == 2
+
+def test_chunks_are_split_into_lines():
+    async def collect():
+        return [line async for line in iter_lines(as_stream([b'{"a"', b': 1}\n{"b": 2}\n{"c"', b": 3}"]), 1024)]
+    assert asyncio.run(collect()) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
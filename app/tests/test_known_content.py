@@ -0,0 +1,59 @@
+import asyncio
+import hashlib
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.fingerprint import text_fingerprint
+from app.services.known_content import KnownContentIndex, add_known_content
+
+def digest(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+def test_known_texts_match_after_normalization():
+    index = KnownContentIndex([
+        ("text", text_fingerprint("Buy followers NOW"), None, "block", {"reason": "spam"}),
+        ("text", text_fingerprint("our slogan"), None, "allow", None),
+    ])
+    blocked = index.match_text(text_fingerprint("  buy   followers now "))
+    assert blocked == {"flagged": True, "categories": {"reason": "spam", "known_content": "block"}}
+    assert index.match_text(text_fingerprint("Our Slogan"))["flagged"] is False
+    assert index.match_text(text_fingerprint("something new")) is None
+
+def test_known_images_match_exactly_or_as_near_duplicates():
+    dhash = 0x0F0F_F0F0_1234_5678
+    index = KnownContentIndex([("image", digest("meme"), f"{dhash:016x}", "block", None)])
+    assert index.match_image(digest("meme"), 0)["flagged"] is True
+    assert index.match_image(digest("repost"), dhash ^ 0b101)["categories"]["known_content"] == "block"
+    assert index.match_image(digest("other"), ~dhash & (2**64 - 1)) is None
+
+def test_empty_index_matches_nothing():
+    index = KnownContentIndex()
+    assert index.match_text(text_fingerprint("hello")) is None
+    assert index.match_image(digest("x"), 12345) is None
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+    async def commit(self):
+        pass
+
+def test_repeated_entries_are_upserted_once_keeping_the_last():
+    """The same text twice in one batch must not reach ON CONFLICT DO UPDATE twice."""
+    fingerprint = text_fingerprint("buy followers now")
+    db = RecordingSession()
+    asyncio.run(add_known_content(db, [
+        {"content_type": "text", "fingerprint": fingerprint, "verdict": "allow", "note": "first"},
+        {"content_type": "text", "fingerprint": text_fingerprint("other"), "verdict": "block", "note": None},
+        {"content_type": "text", "fingerprint": fingerprint, "verdict": "block", "note": "second"},
+    ]))
+    (stmt,) = db.statements
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert [(params[f"fingerprint_m{i}"], params[f"verdict_m{i}"]) for i in range(2)] == [
+        (fingerprint, "block"),
+        (text_fingerprint("other"), "block"),
+    ]
+    assert "fingerprint_m2" not in params
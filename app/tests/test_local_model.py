@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from app.services.local_model import HashedNgramModel, DEFAULT_LEXICON
+
+@pytest.fixture
+def model():
+    return HashedNgramModel.from_lexicon(DEFAULT_LEXICON, buckets=2 ** 16)
+
+def test_lexicon_model_separates_clean_and_abusive_text(model):
+    """Clean text should score low and abusive text above the 0.5 threshold."""
+    clean, abusive = model.score(["Could you help me buy some stuff?", "shut up you stupid idiot"])
+    assert clean < 0.1
+    assert abusive > 0.5
+
+def test_single_severe_terms_and_short_insults_are_flagged(model):
+    """The standalone local engine flags above 0.5, so short abusive texts must clear it."""
+    scores = model.score(["fuck you", "you are an idiot", "shut up loser", "kill yourself", "you bastard"])
+    assert all(score > 0.5 for score in scores)
+
+def test_batch_scores_match_single_scores(model):
+    """Vectorized batch scoring should equal scoring each text alone, including empty texts."""
+    texts = ["", "hello there", "you idiot", "", "kill yourself now"]
+    batch = model.score(texts)
+    single = np.array([model.score([text])[0] for text in texts])
+    assert np.allclose(batch, single)
+
+def test_weights_round_trip_through_safetensors(model, tmp_path):
+    """Saved weights should load back into an identical model."""
+    pytest.importorskip("safetensors")
+    path = str(tmp_path / "model.safetensors")
+    model.save(path)
+    loaded = HashedNgramModel.load(path)
+    assert np.allclose(loaded.score(["you idiot", "hello"]), model.score(["you idiot", "hello"]))
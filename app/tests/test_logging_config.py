@@ -0,0 +1,52 @@
+import logging
+import queue
+import sys
+
+import orjson
+from prometheus_client import REGISTRY
+
+from app.core import logging_config
+from app.core.logging_config import DroppingQueueHandler, JsonFormatter, should_log_access
+
+def make_record(msg="hello %s", args=("world",), level=logging.INFO, **extra):
+    record = logging.LogRecord("moderaai.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def dropped(level):
+    return REGISTRY.get_sample_value("log_records_dropped_total", {"level": level}) or 0
+
+def test_json_formatter_puts_extra_fields_at_top_level():
+    entry = orjson.loads(JsonFormatter().format(make_record(status=200, route="/items/{id}")))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "moderaai.test"
+    assert entry["status"] == 200
+    assert entry["route"] == "/items/{id}"
+    assert "args" not in entry and "exception" not in entry
+
+def test_prepared_records_keep_the_traceback():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("moderaai.test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    prepared = DroppingQueueHandler(queue.Queue()).prepare(record)
+    assert prepared.exc_info is None
+    entry = orjson.loads(JsonFormatter().format(prepared))
+    assert "ValueError: boom" in entry["exception"]
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    before = dropped("WARNING")
+    for _ in range(5):
+        handler.handle(make_record(level=logging.WARNING))
+    assert handler.queue.qsize() == 2
+    assert dropped("WARNING") == before + 3
+
+def test_access_log_sampling(monkeypatch):
+    monkeypatch.setattr(logging_config, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+    assert not should_log_access(200, 0.01)
+    assert should_log_access(503, 0.01)
+    assert should_log_access(200, logging_config.ACCESS_LOG_SLOW_SECONDS)
+    monkeypatch.setattr(logging_config, "ACCESS_LOG_SAMPLE_RATE", 1.0)
+    assert should_log_access(200, 0.01)
@@ -0,0 +1,34 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.middleware import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/items/{item_id}")
+async def read_item(item_id: int):
+    return {"id": item_id}
+
+def request_count(endpoint, status):
+    value = REGISTRY.get_sample_value(
+        "http_requests_total", {"method": "GET", "endpoint": endpoint, "http_status": status}
+    )
+    return value or 0
+
+def test_requests_are_labelled_by_route_template():
+    """Different ids should land in one series named after the route, not the raw path."""
+    before = request_count("/items/{item_id}", "200")
+    with TestClient(app) as client:
+        for item_id in (1, 2, 3):
+            assert client.get(f"/items/{item_id}").status_code == 200
+    assert request_count("/items/{item_id}", "200") == before + 3
+    assert REGISTRY.get_sample_value("http_requests_total", {"method": "GET", "endpoint": "/items/1", "http_status": "200"}) is None
+
+def test_unmatched_paths_share_one_label():
+    before = request_count("unmatched", "404")
+    with TestClient(app) as client:
+        client.get("/nope/1")
+        client.get("/nope/2")
+    assert request_count("unmatched", "404") == before + 2
@@ -0,0 +1,19 @@
+from app.services.prescreen import build_term_pattern, prescreen
+
+def test_term_pattern_matches_whole_words_only():
+    """Blocked terms inside longer words must not match."""
+    pattern = build_term_pattern({"ass", "go die"})
+    assert pattern.search("just go die")
+    assert pattern.search("you ass")
+    assert not pattern.search("a classic passage")
+
+def test_prescreen_settles_severe_terms_and_escalates_uncertain_text():
+    """Severe lexicon hits are flagged locally; mildly abusive text is left for Perspective."""
+    severe, uncertain = prescreen(["You fucking BASTARD", "you idiot"])
+    assert severe is not None and severe > 0.5
+    assert uncertain is None
+
+def test_prescreen_settles_clean_text_with_default_config():
+    """With the built-in model and default thresholds, clean text never leaves the process."""
+    scores = prescreen(["I disagree with this article", "Could you help me buy some stuff?"])
+    assert all(score is not None and score < 0.5 for score in scores)
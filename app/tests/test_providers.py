@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.providers import FakeTextProvider, ProviderRouter, TextProvider, build_router, parse_provider_spec
+
+class StubProvider(TextProvider):
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+
+    async def score_texts(self, texts, concurrency):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return [self.name] * len(texts)
+
+def route(router, texts=("a",)):
+    return asyncio.run(router.route(lambda provider: provider.score_texts(list(texts), 1)))
+
+def test_parse_provider_spec():
+    assert parse_provider_spec("Perspective:9, local:1") == [("perspective", 9.0), ("local", 1.0)]
+    assert parse_provider_spec("vision") == [("vision", 1.0)]
+
+def test_fallback_uses_the_next_provider_only_on_failure():
+    primary, secondary = StubProvider("primary", fail=True), StubProvider("secondary")
+    assert route(ProviderRouter("text", "fallback", [primary, secondary])) == ["secondary"]
+    healthy = StubProvider("healthy")
+    unused = StubProvider("unused")
+    assert route(ProviderRouter("text", "fallback", [healthy, unused])) == ["healthy"]
+    assert unused.calls == 0
+
+def test_all_failures_raise_the_last_error():
+    router = ProviderRouter("text", "fallback", [StubProvider("a", fail=True), StubProvider("b", fail=True)])
+    with pytest.raises(RuntimeError, match="b is down"):
+        route(router)
+
+def test_race_returns_the_first_success_and_cancels_the_rest():
+    slow, fast, broken = StubProvider("slow", delay=1), StubProvider("fast", delay=0.01), StubProvider("broken", fail=True)
+    assert route(ProviderRouter("text", "race", [broken, slow, fast])) == ["fast"]
+    assert slow.cancelled
+
+def test_weighted_split_follows_weights_and_falls_back():
+    heavy, light = StubProvider("heavy"), StubProvider("light")
+    router = ProviderRouter("text", "weighted", [heavy, light], [9, 1])
+    for _ in range(1000):
+        route(router)
+    assert 850 < heavy.calls < 950
+
+    standby = StubProvider("standby")
+    router = ProviderRouter("text", "weighted", [StubProvider("down", fail=True), standby], [1, 0])
+    assert route(router) == ["standby"]
+
+def test_build_router_rejects_unknown_names_and_policies():
+    registry = {"fake": FakeTextProvider()}
+    assert build_router("text", "race", "fake", registry).provider_names == ["fake"]
+    with pytest.raises(ValueError, match="Unknown text provider"):
+        build_router("text", "fallback", "fake,openai", registry)
+    with pytest.raises(ValueError, match="policy"):
+        build_router("text", "fastest", "fake", registry)
+
+def test_fake_text_provider_is_repeatable():
+    provider = FakeTextProvider()
+    first = asyncio.run(provider.score_texts(["hello", "world"], 1))
+    assert first == asyncio.run(provider.score_texts(["hello", "world"], 1))
+    assert all(0 <= score < 1 for score in first)
+
+def test_provider_without_its_method_fails_at_construction():
+    """A provider missing score_texts should be rejected when built, not on its first request."""
+    class Incomplete(TextProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_tier_metrics_are_labelled_with_the_deciding_provider(monkeypatch):
+    """When the first provider fails, the fallback that answered is the tier that decided."""
+    from app.services import moderation
+
+    router = ProviderRouter("text", "fallback", [StubProvider("down", fail=True), StubProvider("backup")])
+    monkeypatch.setattr(moderation, "text_router", router)
+    before = REGISTRY.get_sample_value("moderation_tier_decisions_total", {"tier": "backup", "outcome": "decided"}) or 0
+    assert asyncio.run(moderation._routed_scores(["a", "b"], 1)) == ["backup", "backup"]
+    after = REGISTRY.get_sample_value("moderation_tier_decisions_total", {"tier": "backup", "outcome": "decided"})
+    assert after == before + 2
+    assert REGISTRY.get_sample_value("moderation_tier_decisions_total", {"tier": "down", "outcome": "decided"}) is None
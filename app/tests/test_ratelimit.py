@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import ratelimit as ratelimit_module
+from app.core.ratelimit import AdaptiveConcurrencyLimiter, CapacityExceeded, TokenBucketLimiter, UpstreamLimiter
+
+def test_limit_grows_on_fast_calls_and_halves_on_throttling():
+    """Fast calls should raise the limit additively; a 429 should cut it in half."""
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter("test", initial=10, minimum=2, maximum=100, latency_target=1.0)
+        for _ in range(10):
+            await limiter.acquire(time.monotonic() + 1)
+            await limiter.release(latency=0.01, throttled=False)
+        grown = limiter.limit
+        await limiter.acquire(time.monotonic() + 1)
+        await limiter.release(latency=0.01, throttled=True)
+        return grown, limiter.limit, limiter.inflight
+
+    grown, throttled, inflight = asyncio.run(run())
+    assert 10.9 < grown < 11.1
+    assert throttled == pytest.approx(grown / 2)
+    assert inflight == 0
+
+def test_waiters_past_their_deadline_are_rejected():
+    """A caller that cannot get a slot before its deadline should fail fast."""
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter("test", initial=1, minimum=1, maximum=1, latency_target=1.0)
+        await limiter.acquire(time.monotonic() + 1)
+        with pytest.raises(CapacityExceeded):
+            await limiter.acquire(time.monotonic() + 0.05)
+        await limiter.release(latency=0.01, throttled=False)
+        await limiter.acquire(time.monotonic() + 0.05)
+        return limiter.inflight
+
+    assert asyncio.run(run()) == 1
+
+class BucketRedis:
+    """Evaluates the token bucket script in Python for a bucket that starts full and never refills."""
+
+    def __init__(self):
+        self.tokens = {}
+
+    async def eval(self, script, numkeys, key, rate, capacity, requested):
+        tokens = self.tokens.get(key, capacity)
+        if tokens >= requested:
+            self.tokens[key] = tokens - requested
+            return 0
+        return 60000
+
+def test_requests_above_the_bucket_capacity_are_granted_a_full_bucket(monkeypatch):
+    """A cost larger than the burst could never be granted, so it is clamped to the capacity."""
+    redis_client = BucketRedis()
+
+    async def get_redis():
+        return redis_client
+
+    monkeypatch.setattr(ratelimit_module, "get_redis", get_redis)
+    limiter = TokenBucketLimiter("vision", rate=4, capacity=4)
+    asyncio.run(limiter.acquire(16, time.monotonic() + 1))
+    assert redis_client.tokens[limiter.key] == 0
+    with pytest.raises(CapacityExceeded):
+        asyncio.run(limiter.acquire(16, time.monotonic() + 1))
+
+def test_calls_rejected_by_the_token_bucket_do_not_grow_the_concurrency_limit(monkeypatch):
+    """Nothing went upstream, so a rejection must free its slot without counting as a fast call."""
+    redis_client = BucketRedis()
+
+    async def get_redis():
+        return redis_client
+
+    monkeypatch.setattr(ratelimit_module, "get_redis", get_redis)
+    limiter = UpstreamLimiter("vision", rate=1, burst=1, queue_timeout=0.05,
+                              initial=10, minimum=2, maximum=100, latency_target=1.0)
+    sent = []
+
+    async def send():
+        sent.append(1)
+        return httpx.Response(200)
+
+    async def run():
+        await limiter.call(send)
+        for _ in range(5):
+            with pytest.raises(CapacityExceeded):
+                await limiter.call(send)
+
+    asyncio.run(run())
+    assert len(sent) == 1
+    assert limiter.concurrency.limit == pytest.approx(10 + 1 / 10)
+    assert limiter.concurrency.inflight == 0
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitOpen, ResilientUpstream, RetryBudget
+
+def make_upstream(breaker=None, max_attempts=3, **hedge):
+    breaker = breaker or CircuitBreaker("test", window=10, min_calls=4, failure_rate=0.5, open_seconds=60)
+    return ResilientUpstream("test", breaker, RetryBudget(ratio=0.1, min_per_second=10), max_attempts,
+                             backoff_base=0.001, backoff_cap=0.002, **hedge)
+
+def test_breaker_opens_on_failures_and_recovers_after_probe():
+    """The breaker should open at the failure rate, then close after a successful probe."""
+    breaker = CircuitBreaker("test", window=10, min_calls=4, failure_rate=0.5, open_seconds=60)
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(False)
+    assert breaker.is_open
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    breaker.opened_at -= 60
+    breaker.before_call()  # the single half-open probe
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record(True)
+    breaker.before_call()
+    assert not breaker.is_open
+
+def test_transient_failures_are_retried():
+    """A 503 followed by a 200 should return the 200 after one retry."""
+    statuses = [503, 200]
+
+    async def send():
+        return httpx.Response(statuses.pop(0))
+
+    response = asyncio.run(make_upstream().call(send))
+    assert response.status_code == 200
+    assert statuses == []
+
+def test_client_errors_are_not_retried():
+    """A 400 is the caller's fault and should be returned as is."""
+    calls = []
+
+    async def send():
+        calls.append(1)
+        return httpx.Response(400)
+
+    assert asyncio.run(make_upstream().call(send)).status_code == 400
+    assert len(calls) == 1
+
+def test_slow_call_is_hedged():
+    """Once latency samples exist, a call slower than the percentile gets a second attempt that can win."""
+    delays = [1.0, 0.0]
+
+    async def send():
+        await asyncio.sleep(delays.pop(0))
+        return httpx.Response(200, text="ok")
+
+    async def run():
+        upstream = make_upstream(hedge_enabled=True, hedge_min_delay=0.01, hedge_min_samples=1)
+        upstream.latencies.observe(0.01)
+        return await asyncio.wait_for(upstream.call(send), 0.5)
+
+    assert asyncio.run(run()).text == "ok"
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.services import result_records as records_module
+from app.services.result_records import cache_new_results, lookup_results
+
+class Row:
+    def __init__(self, id, text):
+        self.id, self.text, self.flagged, self.categories = id, text, False, {}
+
+class RecordingSession:
+    """Answers the single ANY(...) query with every row it holds."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def scalars(self, stmt):
+        self.queries.append(stmt)
+        return list(self.rows.values())
+
+class DictRedis:
+    """Just enough of redis.asyncio for VerdictCache: MGET and a SETEX pipeline."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def execute(self):
+        return []
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis_client = DictRedis()
+
+    async def get_redis():
+        return redis_client
+
+    monkeypatch.setattr(cache_module, "get_redis", get_redis)
+    records_module.result_records.local.clear()
+    return redis_client
+
+def test_new_results_are_written_through_to_the_id_cache(fake_redis):
+    """A result cached at creation should be served without touching the database."""
+    session = RecordingSession({})
+
+    async def run():
+        await cache_new_results([7], [{"text": "hi", "flagged": False, "categories": {"toxicity_score": 0.1}}])
+        records_module.result_records.local.clear()  # force the Redis tier
+        return await lookup_results(session, [7])
+
+    assert asyncio.run(run()) == [{"id": 7, "text": "hi", "flagged": False, "categories": {"toxicity_score": 0.1}}]
+    assert session.queries == []
+
+def test_lookup_keeps_request_order_and_backfills_misses(fake_redis):
+    """Misses load in one query, come back in request order and are cached for the next call."""
+    session = RecordingSession({1: Row(1, "a"), 3: Row(3, "c")})
+
+    async def run():
+        first = await lookup_results(session, [3, 2, 1, 3])
+        second = await lookup_results(session, [1, 3])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [record and record["id"] for record in first] == [3, None, 1, 3]
+    assert [record["text"] for record in second] == ["a", "c"]
+    assert len(session.queries) == 1
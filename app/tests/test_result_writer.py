@@ -0,0 +1,64 @@
+import asyncio
+from app.services import result_writer as writer_module
+from app.services.result_writer import ResultWriter
+
+def _record_inserts(monkeypatch):
+    batches = []
+
+    async def fake_insert(rows):
+        batches.append(list(rows))
+
+    monkeypatch.setattr(writer_module, "insert_results", fake_insert)
+    return batches
+
+def test_rows_are_flushed_in_batches_and_on_stop(monkeypatch):
+    """Buffered rows should be bulk-inserted and fully drained on shutdown."""
+    batches = _record_inserts(monkeypatch)
+
+    async def run():
+        writer = ResultWriter(max_rows=5000, batch_size=500, flush_interval=0.05, enqueue_timeout=1)
+        writer.start()
+        await writer.put([{"text": str(i), "flagged": False, "categories": {}} for i in range(1200)])
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(run())
+    assert sum(len(batch) for batch in batches) == 1200
+    assert max(len(batch) for batch in batches) <= 500
+    assert not writer.running
+
+def test_full_buffer_falls_back_to_inline_insert(monkeypatch):
+    """When the buffer stays full, callers write inline instead of waiting forever."""
+    batches = _record_inserts(monkeypatch)
+
+    async def run():
+        writer = ResultWriter(max_rows=2, batch_size=500, flush_interval=0.05, enqueue_timeout=0.01)
+        # No background task is running, so the buffer never drains
+        await writer.put([{"text": str(i), "flagged": False, "categories": {}} for i in range(5)])
+        return writer.queue.qsize()
+
+    assert asyncio.run(run()) == 2
+    assert batches == [[{"text": str(i), "flagged": False, "categories": {}} for i in range(2, 5)]]
+
+def test_failed_flush_is_retried_before_rows_are_dropped(monkeypatch):
+    """A short database outage should delay the batch, not lose it; a long one drops it after the retries."""
+    attempts = []
+
+    async def flaky_insert(rows):
+        attempts.append(len(rows))
+        if len(attempts) < 3:
+            raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(writer_module, "insert_results", flaky_insert)
+    writer = ResultWriter(max_rows=100, batch_size=10, flush_interval=0.01, enqueue_timeout=1, retries=2, retry_backoff=0.001)
+    asyncio.run(writer._flush([{"text": "a"}, {"text": "b"}]))
+    assert attempts == [2, 2, 2]
+
+    async def failing_insert(rows):
+        attempts.append(len(rows))
+        raise ConnectionError("database unavailable")
+
+    attempts.clear()
+    monkeypatch.setattr(writer_module, "insert_results", failing_insert)
+    asyncio.run(writer._flush([{"text": "a"}]))
+    assert attempts == [1, 1, 1]
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.moderation import ModerationResult
+from app.services.results_query import after_cursor, build_filters, decode_cursor, encode_cursor
+
+def compile_where(filters):
+    query = select(ModerationResult.id).where(*filters)
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": False}))
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 1, 10, 15, 12, 345678)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+def test_tampered_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_filters_match_the_indexed_expressions():
+    """Category filters should use JSONB containment and the indexed toxicity_score expression."""
+    sql = compile_where(build_filters(
+        flagged=True,
+        min_toxicity=0.8,
+        safesearch={"violence": "VERY_LIKELY", "adult": None},
+    ))
+    assert "moderation_results.categories @>" in sql
+    assert "CAST(moderation_results.categories ->> 'toxicity_score' AS DOUBLE PRECISION) >" in sql
+
+def test_keyset_condition_and_aware_datetimes():
+    sql = compile_where([after_cursor(encode_cursor(datetime(2025, 3, 1), 7))])
+    assert "(moderation_results.created_at, moderation_results.id) <" in sql
+
+    (clause,) = build_filters(created_after=datetime(2025, 3, 1, 12, tzinfo=timezone.utc))
+    assert clause.right.value == datetime(2025, 3, 1, 12)
+
+def test_page_ending_on_a_legacy_row_without_created_at():
+    """Rows with a NULL created_at sort first; a cursor on one continues with older NULL rows, then dated ones."""
+    cursor = encode_cursor(None, 7)
+    assert decode_cursor(cursor) == (None, 7)
+    sql = compile_where([after_cursor(cursor)])
+    assert "moderation_results.created_at IS NOT NULL OR moderation_results.id <" in sql
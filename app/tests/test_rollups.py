@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.moderation import ModerationRollupMinute
+from app.services.rollups import (
+    LIKELIHOODS,
+    _upsert,
+    fold_results,
+    parse_window,
+    percentiles_from_histogram,
+    track_gaps,
+)
+
+def test_results_fold_into_minute_and_hour_buckets():
+    """Rows should be counted per minute and merged into their hour."""
+    rows = [
+        ("text", True, {"toxicity_score": 0.91}, datetime(2025, 3, 1, 10, 15, 12)),
+        ("text", False, {"toxicity_score": 0.05}, datetime(2025, 3, 1, 10, 15, 48)),
+        ("text", False, {"toxicity_score": 0.2}, datetime(2025, 3, 1, 10, 42, 1)),
+        ("image", True, {"adult": "VERY_LIKELY", "violence": "UNLIKELY"}, datetime(2025, 3, 1, 10, 42, 30)),
+    ]
+    minutes, hours = fold_results(rows)
+
+    minute = minutes[(datetime(2025, 3, 1, 10, 15), "text")]
+    assert (minute["total"], minute["flagged"]) == (2, 1)
+    assert minute["toxicity_histogram"][91] == 1 and minute["toxicity_histogram"][5] == 1
+
+    hour = hours[(datetime(2025, 3, 1, 10), "text")]
+    assert (hour["total"], hour["flagged"]) == (3, 1)
+    image_hour = hours[(datetime(2025, 3, 1, 10), "image")]
+    assert image_hour["safesearch_counts"][LIKELIHOODS.index("VERY_LIKELY")] == 1  # adult is the first category
+
+def test_percentiles_use_the_upper_bin_edge():
+    histogram = [0] * 100
+    histogram[9] = 90
+    histogram[98] = 10
+    assert percentiles_from_histogram(histogram) == {"p50": 0.1, "p90": 0.1, "p95": 0.99, "p99": 0.99}
+    assert percentiles_from_histogram([0] * 100)["p50"] is None
+
+def test_window_parsing():
+    assert parse_window("15m") == 900
+    assert parse_window("24h") == 86400
+    assert parse_window("7d") == 604800
+    with pytest.raises(ValueError):
+        parse_window("yesterday")
+
+def test_rollup_upsert_adds_histograms_elementwise():
+    minutes, _ = fold_results([("text", True, {"toxicity_score": 0.7}, datetime(2025, 3, 1, 10, 15))])
+    sql = str(_upsert(ModerationRollupMinute, minutes).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (bucket_start, content_type) DO UPDATE" in sql
+    assert "unnest(moderation_rollups_minute.toxicity_histogram, excluded.toxicity_histogram)" in sql
+
+def test_ids_skipped_by_the_watermark_are_tracked_until_they_expire():
+    """Ids missing between folded rows may still commit, so they are remembered for a while."""
+    now = datetime(2025, 3, 1, 10, 0)
+    gaps = track_gaps({}, 10, [11, 14, 15], now, timeout=600, max_gaps=100)
+    assert gaps == {"12": now.isoformat(), "13": now.isoformat()}
+
+    later = now + timedelta(seconds=300)
+    gaps = track_gaps(gaps, 15, [17], later, timeout=600, max_gaps=100)
+    assert set(gaps) == {"12", "13", "16"}
+
+    gaps = track_gaps(gaps, 17, [], now + timedelta(seconds=700), timeout=600, max_gaps=100)
+    assert set(gaps) == {"16"}
+
+def test_gap_tracking_is_capped():
+    """A huge jump in ids (e.g. a reset sequence) must not grow the watermark row without bound."""
+    gaps = track_gaps({}, 0, [1_000_000], datetime(2025, 3, 1), timeout=600, max_gaps=50)
+    assert len(gaps) == 50
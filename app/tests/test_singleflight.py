@@ -0,0 +1,36 @@
+import asyncio
+from app.core.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    """Identical concurrent calls should run the wrapped coroutine once."""
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"flagged": False}
+
+    async def run():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("key", compute) for _ in range(20)))
+        return results, len(flights)
+
+    results, inflight = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"flagged": False} for result in results)
+    assert inflight == 0
+
+def test_failures_propagate_to_all_waiters():
+    """Every waiter should see the leader's exception and the key should be released."""
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("key", compute) for _ in range(3)), return_exceptions=True)
+        return results, len(flights)
+
+    results, inflight = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert inflight == 0
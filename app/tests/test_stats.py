@@ -0,0 +1,34 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.stats import increment_stats, summarize
+
+def test_summary_breaks_counts_down_by_content_type():
+    """Totals should add up across content types and flagged status."""
+    stats = summarize([("text", True, 3), ("text", False, 7), ("image", True, 2)])
+    assert stats["total_moderated"] == 12
+    assert stats["flagged_count"] == 5
+    assert stats["non_flagged_count"] == 7
+    assert stats["by_content_type"]["text"] == {"flagged": 3, "non_flagged": 7, "total": 10}
+    assert stats["by_content_type"]["image"] == {"flagged": 2, "non_flagged": 0, "total": 2}
+
+def test_inserted_rows_become_one_counter_upsert():
+    """A batch of rows should be folded into one upsert with a row per counter."""
+    statements = []
+
+    class RecordingSession:
+        async def execute(self, stmt):
+            statements.append(stmt)
+
+    rows = [
+        {"text": "a", "flagged": True, "categories": {}, "content_type": "text"},
+        {"text": "b", "flagged": True, "categories": {}, "content_type": "text"},
+        {"text": "c.jpg", "flagged": False, "categories": {}, "content_type": "image"},
+    ]
+    asyncio.run(increment_stats(RecordingSession(), rows))
+
+    assert len(statements) == 1
+    compiled = statements[0].compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (content_type, flagged) DO UPDATE" in str(compiled)
+    assert sorted(v for k, v in compiled.params.items() if k.startswith("count")) == [1, 2]
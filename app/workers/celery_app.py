@@ -0,0 +1,32 @@
+from celery import Celery
+
+from app.core.config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    CELERY_PREFETCH_MULTIPLIER,
+    CELERY_RESULT_EXPIRES,
+    CELERY_WORKER_CONCURRENCY,
+)
+
+celery_app = Celery(
+    "moderaai",
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
+    include=["app.workers.tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    result_expires=CELERY_RESULT_EXPIRES,
+    # Task threads share the process's event loop and text batcher (see app.workers.tasks);
+    # under prefork each process runs one task at a time, so nothing would batch
+    worker_pool="threads",
+    worker_concurrency=CELERY_WORKER_CONCURRENCY,
+    # Keep enough tasks reserved per worker for the shared event loop to batch them
+    worker_prefetch_multiplier=CELERY_PREFETCH_MULTIPLIER,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    task_track_started=True,
+)
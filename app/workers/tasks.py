@@ -0,0 +1,71 @@
+import asyncio
+import base64
+import threading
+
+from celery.signals import worker_init
+
+from app.core.batching import MicroBatcher
+from app.core.config import WORKER_TEXT_BATCH_SIZE, WORKER_BATCH_WINDOW_MS, KNOWN_CONTENT_ENABLED
+from app.services.moderation import moderate_texts, moderate_image
+from app.services.image_preprocess import prepare_image
+from app.services.known_content import known_content
+from app.workers.celery_app import celery_app
+
+# One event loop per worker process, shared by every task thread. Tasks running
+# concurrently (e.g. `--pool threads`) share its HTTP, Redis and DB pools, and
+# their texts are batched into a single moderate_texts call.
+_loop = None
+_loop_lock = threading.Lock()
+_text_batcher = None
+_batch_texts = False  # only when this process runs tasks concurrently
+
+
+@worker_init.connect
+def _detect_pool(sender, **kwargs):
+    """Batch texts only under the threads pool; a prefork or solo process would just wait out the window."""
+    global _batch_texts
+    pool = sender.pool_cls if isinstance(sender.pool_cls, str) else sender.pool_cls.__module__
+    _batch_texts = "thread" in pool and sender.concurrency > 1
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="moderation-loop", daemon=True).start()
+            if KNOWN_CONTENT_ENABLED:
+                asyncio.run_coroutine_threadsafe(known_content.start(), _loop)
+    return _loop
+
+
+def run_async(coro):
+    """Run a coroutine on the worker's event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+async def _moderate_batched_text(text):
+    global _text_batcher
+    if _text_batcher is None:
+        _text_batcher = MicroBatcher(moderate_texts, WORKER_TEXT_BATCH_SIZE, WORKER_BATCH_WINDOW_MS / 1000)
+    return await _text_batcher.submit(text)
+
+
+@celery_app.task(name="moderaai.test_celery")
+def test_celery():
+    return "OK"
+
+
+@celery_app.task(name="moderaai.moderate_text")
+def moderate_text_task(text: str) -> dict:
+    if _batch_texts:
+        return run_async(_moderate_batched_text(text))
+    return run_async(moderate_texts([text]))[0]
+
+
+@celery_app.task(name="moderaai.moderate_image")
+def moderate_image_task(filename: str, image_base64: str) -> dict:
+    image_bytes = base64.b64decode(image_base64)
+    # Task threads are already off the event loop, so preprocess inline
+    prepared = prepare_image(image_bytes)
+    return run_async(moderate_image(filename, prepared))
@@ -0,0 +1,134 @@
+"""
+Local stand-in for the Perspective and Vision APIs.
+
+    python -m benchmarks.fake_upstream --port 9100 --latency-ms 80 --error-rate 0.01
+
+Point the API at it with PERSPECTIVE_API_URL and GOOGLE_VISION_API_URL. Scores
+are derived from a hash of the input, so the same text or image always gets
+the same verdict and roughly `--flag-rate` of inputs are flagged.
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+PERSPECTIVE_PATH = "/v1alpha1/comments:analyze"
+VISION_PATH = "/v1/images:annotate"
+SAFESEARCH_CATEGORIES = ("adult", "spoof", "medical", "violence", "racy")
+LIKELIHOODS = ("VERY_UNLIKELY", "UNLIKELY", "POSSIBLE", "LIKELY", "VERY_LIKELY")
+
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 50.0  # median response time
+    latency_sigma: float = 0.5  # spread of the log-normal latency; 0 for a fixed delay
+    error_rate: float = 0.0  # share of calls answered with 503
+    throttle_rate: float = 0.0  # share of calls answered with 429
+    flag_rate: float = 0.1  # share of inputs scored as toxic / unsafe
+
+    def delay(self) -> float:
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return random.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def failure(self):
+        """A status code to fail this call with, or None."""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+
+def _unit(data: bytes) -> float:
+    """Deterministic value in [0, 1) for a piece of input."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big") / 2**64
+
+
+def toxicity_score(text: str, flag_rate: float) -> float:
+    """Scores above 0.5 for about `flag_rate` of texts, below it for the rest."""
+    u = _unit(text.encode("utf-8"))
+    if u < flag_rate:
+        return round(0.501 + 0.499 * (1 - u / flag_rate), 4)
+    return round(0.5 * (u - flag_rate) / (1 - flag_rate), 4)
+
+
+def safesearch(content: str, flag_rate: float) -> dict:
+    """A SafeSearch annotation that is LIKELY adult or violent for about `flag_rate` of images."""
+    digest = hashlib.blake2b(content.encode("ascii"), digest_size=16).digest()
+    u = int.from_bytes(digest[:8], "big") / 2**64
+    # Unflagged categories range over VERY_UNLIKELY..POSSIBLE
+    annotation = {category: LIKELIHOODS[digest[8 + i] % 3] for i, category in enumerate(SAFESEARCH_CATEGORIES)}
+    if u < flag_rate:
+        annotation["adult" if u < flag_rate / 2 else "violence"] = "LIKELY"
+    return annotation
+
+
+def create_app(profile: UpstreamProfile = None) -> FastAPI:
+    profile = profile or UpstreamProfile()
+    app = FastAPI(title="Fake Google moderation APIs")
+    app.state.profile = profile
+    app.state.calls = {"perspective": 0, "vision": 0, "vision_images": 0, "failed": 0}
+
+    async def simulate(kind: str):
+        app.state.calls[kind] += 1
+        await asyncio.sleep(profile.delay())
+        status_code = profile.failure()
+        if status_code:
+            app.state.calls["failed"] += 1
+            return JSONResponse({"error": {"code": status_code, "message": "Simulated failure"}}, status_code=status_code)
+        return None
+
+    @app.post(PERSPECTIVE_PATH)
+    async def analyze(request: Request):
+        body = await request.json()
+        failure = await simulate("perspective")
+        if failure:
+            return failure
+        score = toxicity_score(body["comment"]["text"], profile.flag_rate)
+        return {"attributeScores": {"TOXICITY": {"summaryScore": {"value": score, "type": "PROBABILITY"}}}}
+
+    @app.post(VISION_PATH)
+    async def annotate(request: Request):
+        body = await request.json()
+        app.state.calls["vision_images"] += len(body["requests"])
+        failure = await simulate("vision")
+        if failure:
+            return failure
+        return {"responses": [
+            {"safeSearchAnnotation": safesearch(entry["image"]["content"], profile.flag_rate)}
+            for entry in body["requests"]
+        ]}
+
+    @app.get("/calls")
+    async def calls():
+        """Call counters, so a benchmark can report how many upstream calls each scenario cost."""
+        return app.state.calls
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake Perspective and Vision APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=UpstreamProfile.latency_ms)
+    parser.add_argument("--latency-sigma", type=float, default=UpstreamProfile.latency_sigma)
+    parser.add_argument("--error-rate", type=float, default=UpstreamProfile.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=UpstreamProfile.throttle_rate)
+    parser.add_argument("--flag-rate", type=float, default=UpstreamProfile.flag_rate)
+    args = parser.parse_args()
+
+    profile = UpstreamProfile(args.latency_ms, args.latency_sigma, args.error_rate, args.throttle_rate, args.flag_rate)
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Run the benchmark scenarios against a local API and fake Google APIs.
+
+    docker compose up -d postgres redis
+    python -m benchmarks.run --duration 30 --output results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.2
+
+The runner starts benchmarks.fake_upstream and the API (uvicorn app.main:app)
+as subprocesses, drives each scenario with a fixed number of concurrent
+clients and prints one JSON document with throughput, latency percentiles,
+API memory and upstream call counts per scenario. With --baseline it exits
+non-zero when a scenario regressed by more than --tolerance.
+"""
+import argparse
+import asyncio
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import orjson
+
+from benchmarks.workloads import SCENARIOS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: list, pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    """Throughput and latency percentiles (ms) for one scenario; only successful requests are timed."""
+    ordered = sorted(latencies)
+    total = len(ordered) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": _ms(percentile(ordered, 50)),
+            "p95": _ms(percentile(ordered, 95)),
+            "p99": _ms(percentile(ordered, 99)),
+            "mean": _ms(sum(ordered) / len(ordered) if ordered else None),
+            "max": _ms(ordered[-1] if ordered else None),
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of `results` against `baseline`, as human-readable lines (empty when none)."""
+    previous = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    for scenario in results["scenarios"]:
+        before = previous.get(scenario["name"])
+        if not before:
+            continue
+        name = scenario["name"]
+        if scenario["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {scenario['throughput_rps']} rps, baseline {before['throughput_rps']} rps")
+        for pct in ("p95", "p99"):
+            now, then = scenario["latency_ms"][pct], before["latency_ms"][pct]
+            if now is not None and then and now > then * (1 + tolerance):
+                regressions.append(f"{name}: {pct} {now} ms, baseline {then} ms")
+        if scenario["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {scenario['error_rate']}, baseline {before['error_rate']}")
+    return regressions
+
+
+def rss_mb(pid: int):
+    """Resident memory of a process in MB (Linux only; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def start_process(args: list, env: dict = None, log_path: str = None) -> subprocess.Popen:
+    output = open(log_path, "ab") if log_path else subprocess.DEVNULL
+    return subprocess.Popen([sys.executable, *args], cwd=ROOT, env=env, stdout=output, stderr=subprocess.STDOUT)
+
+
+def stop_process(process: subprocess.Popen):
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(url)).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+        await asyncio.sleep(0.25)
+
+
+async def run_scenario(client: httpx.AsyncClient, upstream_url: str, workload, args, api_pid) -> dict:
+    workload.prepare(uuid.uuid4().hex[:12], seed=args.seed)
+
+    # Warm the cache with the hot set, then run briefly unmeasured so pools are open
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def send(request):
+        async with semaphore:
+            _, path, kwargs = request
+            await client.post(path, **kwargs)
+
+    await asyncio.gather(*(send(request) for request in workload.warmup_requests()))
+    await drive(client, workload, args.concurrency, args.warmup)
+
+    calls_before = (await client.get(f"{upstream_url}/calls")).json()
+    peak_rss = rss_mb(api_pid) if api_pid else None
+    sampling = True
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while sampling:
+            current = rss_mb(api_pid)
+            if current is not None:
+                peak_rss = max(peak_rss or 0, current)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_memory()) if api_pid else None
+    latencies, errors, elapsed = await drive(client, workload, args.concurrency, args.duration)
+    sampling = False
+    if sampler:
+        await sampler
+    calls_after = (await client.get(f"{upstream_url}/calls")).json()
+
+    return {
+        "name": workload.name,
+        "image_share": workload.image_share,
+        "hit_ratio": workload.hit_ratio,
+        **summarize(latencies, errors, elapsed),
+        "api_rss_mb": {"peak": peak_rss, "end": rss_mb(api_pid) if api_pid else None},
+        "upstream_calls": {key: calls_after[key] - calls_before.get(key, 0) for key in calls_after},
+    }
+
+
+async def drive(client: httpx.AsyncClient, workload, concurrency: int, duration: float) -> tuple:
+    """Closed loop: `concurrency` clients each send the next request as soon as the previous one returns."""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            _, path, kwargs = workload.next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, **kwargs)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def api_environment(upstream_url: str, log_dir: str) -> dict:
+    env = dict(os.environ)
+    env["PERSPECTIVE_API_URL"] = f"{upstream_url}/v1alpha1/comments:analyze"
+    env["GOOGLE_VISION_API_URL"] = f"{upstream_url}/v1/images:annotate"
+    env.setdefault("GOOGLE_MODERATION_API_KEY", "benchmark")
+    # Measure the service, not the shared Google quota; export these to benchmark with real limits
+    env.setdefault("PERSPECTIVE_QPS", "1000000")
+    env.setdefault("VISION_QPS", "1000000")
+    env.setdefault("LOG_FILE", os.path.join(log_dir, "api.log"))
+    return env
+
+
+async def run(args) -> dict:
+    log_dir = os.path.abspath(args.log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    base_url = args.base_url or f"http://127.0.0.1:{args.api_port}"
+    processes = []
+    try:
+        processes.append(start_process([
+            "-m", "benchmarks.fake_upstream",
+            "--port", str(args.upstream_port),
+            "--latency-ms", str(args.upstream_latency_ms),
+            "--latency-sigma", str(args.upstream_latency_sigma),
+            "--error-rate", str(args.upstream_error_rate),
+            "--throttle-rate", str(args.upstream_throttle_rate),
+        ], log_path=os.path.join(log_dir, "upstream.log")))
+        api_pid = args.api_pid
+        if not args.base_url:
+            api = start_process(
+                ["-m", "uvicorn", "app.main:app", "--port", str(args.api_port), "--log-level", "warning"],
+                env=api_environment(upstream_url, log_dir),
+                log_path=os.path.join(log_dir, "api.out"),
+            )
+            processes.append(api)
+            api_pid = api.pid
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            await wait_until_ready(client, f"{upstream_url}/calls")
+            await wait_until_ready(client, "/health")
+            # Fail early, with the API's own error, when Postgres or Redis is not reachable
+            probe = await client.post("/api/v1/moderate/text", json={"text": f"benchmark probe {uuid.uuid4().hex}"})
+            if probe.status_code != 200:
+                raise RuntimeError(f"API is not ready: {probe.status_code} {probe.text}")
+
+            scenarios = []
+            for name in args.scenarios:
+                print(f"Running {name}...", file=sys.stderr)
+                scenarios.append(await run_scenario(client, upstream_url, SCENARIOS[name], args, api_pid))
+    finally:
+        for process in reversed(processes):
+            stop_process(process)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "upstream": {
+                "latency_ms": args.upstream_latency_ms,
+                "latency_sigma": args.upstream_latency_sigma,
+                "error_rate": args.upstream_error_rate,
+                "throttle_rate": args.upstream_throttle_rate,
+            },
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ModeraAI against fake Google APIs.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    parser.add_argument("--upstream-latency-sigma", type=float, default=0.5)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-port", type=int, default=9100)
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--base-url", help="benchmark an API that is already running instead of starting one")
+    parser.add_argument("--api-pid", type=int, help="process to sample memory from when using --base-url")
+    parser.add_argument("--log-dir", default=os.path.join(tempfile.gettempdir(), "moderaai-benchmarks"), help="where the API and fake upstream logs go")
+    parser.add_argument("--output", help="also write the results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+    output = orjson.dumps(results, option=orjson.OPT_INDENT_2)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(output)
+    sys.stdout.write(output.decode("utf-8") + "\n")
+
+    if args.baseline:
+        with open(args.baseline, "rb") as f:
+            regressions = compare(results, orjson.loads(f.read()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
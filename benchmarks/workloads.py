@@ -0,0 +1,87 @@
+import io
+import random
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+TEXT_PATH = "/api/v1/moderate/text"
+IMAGE_PATH = "/api/v1/moderate/image"
+
+WORDS = (
+    "the quick service replied within seconds and the order arrived late but intact so overall "
+    "i would recommend this seller although the packaging could be better next time thanks again"
+).split()
+
+
+def random_text(rng: random.Random, prefix: str) -> str:
+    """A comment-sized text; `prefix` keeps it unique to this run and request."""
+    return f"{prefix} " + " ".join(rng.choices(WORDS, k=rng.randint(8, 40)))
+
+
+def random_image(rng: random.Random, size: int = 96) -> bytes:
+    """A small noise JPEG; every call yields a distinct image (and perceptual hash)."""
+    pixels = np.random.default_rng(rng.getrandbits(64)).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def text_request(text: str) -> tuple:
+    return "text", TEXT_PATH, {"json": {"text": text}}
+
+
+def image_request(name: str, image_bytes: bytes) -> tuple:
+    return "image", IMAGE_PATH, {"files": {"file": (f"{name}.jpg", image_bytes, "image/jpeg")}}
+
+
+@dataclass
+class Workload:
+    """
+    A request mix: `image_share` of requests are image uploads, the rest texts,
+    and `hit_ratio` of them repeat an input from a hot set that is sent once
+    during warm-up, so they should be answered from the cache.
+    """
+
+    name: str
+    image_share: float = 0.0
+    hit_ratio: float = 0.0
+    hot_set: int = 200
+
+    def prepare(self, run_id: str, seed: int = 0):
+        self.run_id = run_id
+        self.rng = random.Random(seed)
+        self.sequence = 0
+        self.hot_texts = [random_text(self.rng, f"{run_id} hot {i}") for i in range(self.hot_set)] if self.image_share < 1 else []
+        self.hot_images = [random_image(self.rng) for _ in range(self.hot_set)] if self.image_share > 0 and self.hit_ratio > 0 else []
+
+    def warmup_requests(self) -> list:
+        """Requests that put the hot set in the cache before measuring."""
+        if not self.hit_ratio:
+            return []
+        return (
+            [text_request(text) for text in self.hot_texts]
+            + [image_request(f"hot-{i}", image) for i, image in enumerate(self.hot_images)]
+        )
+
+    def next_request(self) -> tuple:
+        """(kind, path, httpx keyword arguments) for the next request in the mix."""
+        self.sequence += 1
+        hit = self.rng.random() < self.hit_ratio
+        if self.rng.random() < self.image_share:
+            if hit:
+                return image_request("hot", self.rng.choice(self.hot_images))
+            return image_request(f"cold-{self.sequence}", random_image(self.rng))
+        if hit:
+            return text_request(self.rng.choice(self.hot_texts))
+        return text_request(random_text(self.rng, f"{self.run_id} cold {self.sequence}"))
+
+
+SCENARIOS = {
+    "text": Workload("text"),
+    "image": Workload("image", image_share=1.0),
+    "mixed": Workload("mixed", image_share=0.2, hit_ratio=0.5),
+    "cache_hit_50": Workload("cache_hit_50", hit_ratio=0.5),
+    "cache_hit_90": Workload("cache_hit_90", hit_ratio=0.9),
+    "cache_hit_99": Workload("cache_hit_99", hit_ratio=0.99),
+}
@@ -10,5 +10,62 @@ CREATE TABLE IF NOT EXISTS moderation_results (
     text TEXT NOT NULL,
     flagged BOOLEAN NOT NULL,
     categories JSONB NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_type VARCHAR NOT NULL DEFAULT 'text'
+);
+
+-- Running counts by content type and flagged status, updated with every insert
+CREATE TABLE IF NOT EXISTS moderation_stats (
+    content_type VARCHAR NOT NULL,
+    flagged BOOLEAN NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (content_type, flagged)
+);
+
+-- Minute and hour rollups behind the time-windowed /stats, filled by the background aggregator
+CREATE TABLE IF NOT EXISTS moderation_rollups_minute (
+    bucket_start TIMESTAMP NOT NULL,
+    content_type VARCHAR NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    flagged BIGINT NOT NULL DEFAULT 0,
+    toxicity_histogram BIGINT[] NOT NULL,
+    safesearch_counts BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket_start, content_type)
+);
+
+CREATE TABLE IF NOT EXISTS moderation_rollups_hour (
+    bucket_start TIMESTAMP NOT NULL,
+    content_type VARCHAR NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    flagged BIGINT NOT NULL DEFAULT 0,
+    toxicity_histogram BIGINT[] NOT NULL,
+    safesearch_counts BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket_start, content_type)
+);
+
+-- Highest moderation_results id already folded into the rollups
+CREATE TABLE IF NOT EXISTS moderation_rollup_watermark (
+    id SMALLINT PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    gaps JSONB NOT NULL DEFAULT '{}'
+);
+INSERT INTO moderation_rollup_watermark (id, last_id) VALUES (1, 0) ON CONFLICT DO NOTHING;
+
+-- Indexes behind the keyset-paginated result search and its filters
+CREATE INDEX IF NOT EXISTS ix_moderation_results_created_at_id ON moderation_results (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_moderation_results_type_flagged_created_at ON moderation_results (content_type, flagged, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_moderation_results_categories ON moderation_results USING gin (categories jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS ix_moderation_results_toxicity_score ON moderation_results (((categories ->> 'toxicity_score')::double precision));
+
+-- Known content with a fixed verdict, loaded into memory by every API process
+CREATE TABLE IF NOT EXISTS known_content (
+    id SERIAL PRIMARY KEY,
+    content_type VARCHAR NOT NULL,
+    fingerprint VARCHAR NOT NULL,
+    dhash VARCHAR(16),
+    verdict VARCHAR NOT NULL,
+    categories JSONB,
+    note VARCHAR,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_known_content_fingerprint UNIQUE (content_type, fingerprint)
 );
@@ -0,0 +1,42 @@
+"""add content type and moderation stats counters
+
+Revision ID: 3f1c9a7e5b20
+Revises: ad3d5b7229e6
+Create Date: 2026-10-18 10:12:41.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7e5b20'
+down_revision: Union[str, None] = 'ad3d5b7229e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE moderation_results ADD COLUMN IF NOT EXISTS content_type VARCHAR NOT NULL DEFAULT 'text'")
+    # Image rows are the ones carrying a Vision SafeSearch annotation
+    op.execute("UPDATE moderation_results SET content_type = 'image' WHERE categories ? 'adult'")
+
+    op.create_table('moderation_stats',
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('flagged', sa.Boolean(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('content_type', 'flagged')
+    )
+    # Seed the counters once; from here on they are bumped by every insert
+    op.execute(
+        "INSERT INTO moderation_stats (content_type, flagged, count) "
+        "SELECT content_type, COALESCE(flagged, false), count(*) FROM moderation_results "
+        "GROUP BY content_type, COALESCE(flagged, false)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('moderation_stats')
+    op.drop_column('moderation_results', 'content_type')
@@ -0,0 +1,52 @@
+"""add minute and hour moderation rollups
+
+Revision ID: 8b2d4e6f1a39
+Revises: 3f1c9a7e5b20
+Create Date: 2026-10-18 11:03:17.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a39'
+down_revision: Union[str, None] = '3f1c9a7e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_rollup_table(name: str) -> None:
+    op.create_table(name,
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('flagged', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('toxicity_histogram', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+    sa.Column('safesearch_counts', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_start', 'content_type')
+    )
+
+
+def upgrade() -> None:
+    # init.sql always had created_at; databases built from the migrations did not
+    op.execute("ALTER TABLE moderation_results ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+
+    _create_rollup_table('moderation_rollups_minute')
+    _create_rollup_table('moderation_rollups_hour')
+    op.create_table('moderation_rollup_watermark',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('last_id', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Starting from 0 makes the aggregator backfill existing results on first run
+    op.execute("INSERT INTO moderation_rollup_watermark (id, last_id) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('moderation_rollup_watermark')
+    op.drop_table('moderation_rollups_hour')
+    op.drop_table('moderation_rollups_minute')
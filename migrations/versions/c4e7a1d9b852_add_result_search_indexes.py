@@ -0,0 +1,41 @@
+"""add indexes for result search
+
+Revision ID: c4e7a1d9b852
+Revises: 8b2d4e6f1a39
+Create Date: 2026-10-18 12:21:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1d9b852'
+down_revision: Union[str, None] = '8b2d4e6f1a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    # Keyset pagination, newest first
+    'ix_moderation_results_created_at_id': "(created_at DESC, id DESC)",
+    # Same order within a content type / flagged slice
+    'ix_moderation_results_type_flagged_created_at': "(content_type, flagged, created_at DESC, id DESC)",
+    # SafeSearch likelihood filters (categories @> '{...}')
+    'ix_moderation_results_categories': "USING gin (categories jsonb_path_ops)",
+    # toxicity_score thresholds
+    'ix_moderation_results_toxicity_score': "((categories ->> 'toxicity_score')::double precision)",
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the table writable while the indexes build, and cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON moderation_results {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
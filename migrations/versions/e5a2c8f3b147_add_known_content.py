@@ -0,0 +1,38 @@
+"""add known content blocklist and allowlist
+
+Revision ID: e5a2c8f3b147
+Revises: c4e7a1d9b852
+Create Date: 2026-10-18 14:02:41.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a2c8f3b147'
+down_revision: Union[str, None] = 'c4e7a1d9b852'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('known_content',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.String(), nullable=False),
+    sa.Column('dhash', sa.String(length=16), nullable=True),
+    sa.Column('verdict', sa.String(), nullable=False),
+    sa.Column('categories', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_type', 'fingerprint', name='uq_known_content_fingerprint')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('known_content')
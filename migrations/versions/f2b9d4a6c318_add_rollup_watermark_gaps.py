@@ -0,0 +1,29 @@
+"""track id gaps behind the rollup watermark
+
+Revision ID: f2b9d4a6c318
+Revises: e5a2c8f3b147
+Create Date: 2026-10-18 16:20:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d4a6c318'
+down_revision: Union[str, None] = 'e5a2c8f3b147'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('moderation_rollup_watermark',
+    sa.Column('gaps', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('moderation_rollup_watermark', 'gaps')